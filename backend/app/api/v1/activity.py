@@ -2,38 +2,69 @@
 
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from pydantic import BaseModel, ConfigDict, Field
 
-from app.dependencies import ensure_org_member, require_current_user
-from app.supabase_client import get_supabase_client
+from app.cache import TTLCache
+from app.dependencies import call_org_rpc, ensure_org_member, require_current_user
+from app.etag import json_with_etag
+from app.pagination import decode_cursor, paginate
+from app.services.activity_buffer import insert_activity_event
 
 router = APIRouter()
 
+# First page of each org's feed (newest _FEED_CACHE_ROWS events), written through on insert.
+# Per process, so other workers may lag by up to the TTL.
+_FEED_CACHE_ROWS = 101
+_feed_cache = TTLCache(maxsize=2_000, ttl=30)
+
 
 class CreateEventBody(BaseModel):
-    event_type: str
+    model_config = ConfigDict(extra="ignore", str_strip_whitespace=True, frozen=True)
+
+    event_type: str = Field(..., min_length=1, max_length=100)
     payload: dict = {}
 
 
 @router.get("/organizations/{organization_id}/activity")
 def list_activity(
+    request: Request,
     organization_id: UUID,
     limit: int = 20,
+    cursor: str | None = None,
     user_id: str = Depends(require_current_user),
 ):
-    """Return recent activity events for the organization. Requires auth and org membership."""
-    ensure_org_member(organization_id, user_id)
-    client = get_supabase_client()
-    r = (
-        client.table("activity_events")
-        .select("id, organization_id, user_id, event_type, payload, created_at")
-        .eq("organization_id", str(organization_id))
-        .order("created_at", desc=True)
-        .limit(min(limit, 100))
-        .execute()
-    )
-    return {"events": r.data or []}
+    """Return recent activity events for the organization. Requires auth and org membership.
+    Pass next_cursor from the previous response as cursor to get the next page.
+    Sends an ETag; polls with a matching If-None-Match get 304."""
+    org_id = str(organization_id)
+    limit = max(1, min(limit, 100))
+    cursor_created_at, cursor_id = decode_cursor(cursor)
+    if cursor_created_at is None:
+        cached = _feed_cache.get(org_id)
+        if cached is not None:
+            ensure_org_member(org_id, user_id)
+            rows = cached[:limit + 1]
+        else:
+            cached = call_org_rpc("org_list_activity", {
+                "p_organization_id": org_id,
+                "p_user_id": user_id,
+                "p_limit": _FEED_CACHE_ROWS,
+                "p_cursor_created_at": None,
+                "p_cursor_id": None,
+            }) or []
+            _feed_cache.set(org_id, cached)
+            rows = cached[:limit + 1]
+    else:
+        rows = call_org_rpc("org_list_activity", {
+            "p_organization_id": org_id,
+            "p_user_id": user_id,
+            "p_limit": limit + 1,
+            "p_cursor_created_at": cursor_created_at,
+            "p_cursor_id": cursor_id,
+        }) or []
+    events, next_cursor = paginate(rows, limit)
+    return json_with_etag(request, {"events": events, "next_cursor": next_cursor})
 
 
 @router.post("/organizations/{organization_id}/activity", status_code=status.HTTP_201_CREATED)
@@ -43,16 +74,19 @@ def create_activity_event(
     user_id: str = Depends(require_current_user),
 ):
     """Insert an activity event for the org (insert helper). Requires auth and org membership."""
-    ensure_org_member(organization_id, user_id)
-    client = get_supabase_client()
+    org_id = str(organization_id)
+    ensure_org_member(org_id, user_id)
     row = {
-        "organization_id": str(organization_id),
+        "organization_id": org_id,
         "user_id": user_id,
         "event_type": body.event_type,
         "payload": body.payload or {},
     }
-    r = client.table("activity_events").insert(row).execute()
-    if not r.data or len(r.data) == 0:
+    created = insert_activity_event(row)
+    if not created:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to create event")
-    return r.data[0]
+    cached = _feed_cache.get(org_id)
+    if cached is not None:
+        _feed_cache.set(org_id, [created, *cached[:_FEED_CACHE_ROWS - 1]])
+    return created
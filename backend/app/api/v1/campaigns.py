@@ -1,23 +1,30 @@
 """P2-CAMP-001: Campaigns — list, get, create, update; target_rules and recipients.
 P2-SES-002: Send campaign batch via SES (prepare + send)."""
 
+from typing import Literal
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from pydantic import BaseModel, ConfigDict
 
-from app.dependencies import ensure_org_member, require_current_user
+from app.dependencies import call_org_rpc, ensure_org_member, require_current_user
+from app.etag import json_with_etag
+from app.pagination import decode_cursor, paginate
 from app.services.campaign_send import (
     DEFAULT_RATE_PER_SEC,
     prepare_campaign_recipients,
     send_campaign_batch,
 )
-from app.supabase_client import get_supabase_client
 
 router = APIRouter()
 
+CampaignStatus = Literal["draft", "scheduled", "sending", "sent", "failed", "paused"]
+RecipientStatus = Literal["pending", "sent", "delivered", "bounced", "opened", "clicked"]
+
 
 class CreateCampaignBody(BaseModel):
+    model_config = ConfigDict(extra="ignore", str_strip_whitespace=True, frozen=True)
+
     name: str
     template_id: UUID | None = None
     subject_line: str | None = None
@@ -25,6 +32,8 @@ class CreateCampaignBody(BaseModel):
 
 
 class UpdateCampaignBody(BaseModel):
+    model_config = ConfigDict(extra="ignore", str_strip_whitespace=True, frozen=True)
+
     name: str | None = None
     template_id: UUID | None = None
     subject_line: str | None = None
@@ -33,6 +42,8 @@ class UpdateCampaignBody(BaseModel):
 
 
 class TargetRulesBody(BaseModel):
+    model_config = ConfigDict(extra="ignore", str_strip_whitespace=True, frozen=True)
+
     include_tags: list[str] | None = None
     exclude_tags: list[str] | None = None
     exclude_countries: list[str] | None = None
@@ -44,26 +55,24 @@ class TargetRulesBody(BaseModel):
 @router.get("/organizations/{organization_id}/campaigns")
 def list_campaigns(
     organization_id: UUID,
-    status_filter: str | None = Query(
+    status_filter: CampaignStatus | None = Query(
         None, alias="status", description="draft, scheduled, sending, sent, failed, paused"),
     limit: int = Query(50, ge=1, le=100),
-    offset: int = Query(0, ge=0),
+    cursor: str | None = Query(None, description="next_cursor from the previous page"),
     user_id: str = Depends(require_current_user),
 ):
-    """List campaigns for the org. Optional status filter."""
-    ensure_org_member(organization_id, user_id)
-    client = get_supabase_client()
-    q = (
-        client.table("campaigns")
-        .select("id, organization_id, name, status, template_id, subject_line, scheduled_at, sent_at, created_at, updated_at", count="exact")
-        .eq("organization_id", str(organization_id))
-        .order("created_at", desc=True)
-        .range(offset, offset + limit - 1)
-    )
-    if status_filter:
-        q = q.eq("status", status_filter)
-    r = q.execute()
-    return {"campaigns": r.data or [], "total": r.count or 0}
+    """List campaigns for the org. Optional status filter. Keyset-paginated via cursor."""
+    cursor_created_at, cursor_id = decode_cursor(cursor)
+    result = call_org_rpc("org_list_campaigns", {
+        "p_organization_id": str(organization_id),
+        "p_user_id": user_id,
+        "p_status": status_filter or None,
+        "p_limit": limit + 1,
+        "p_cursor_created_at": cursor_created_at,
+        "p_cursor_id": cursor_id,
+    }) or {}
+    campaigns, next_cursor = paginate(result.get("campaigns") or [], limit)
+    return {"campaigns": campaigns, "total": result.get("total") or 0, "next_cursor": next_cursor}
 
 
 @router.get("/organizations/{organization_id}/campaigns/{campaign_id}")
@@ -73,20 +82,15 @@ def get_campaign(
     user_id: str = Depends(require_current_user),
 ):
     """Get a campaign by id."""
-    ensure_org_member(organization_id, user_id)
-    client = get_supabase_client()
-    r = (
-        client.table("campaigns")
-        .select("*")
-        .eq("id", str(campaign_id))
-        .eq("organization_id", str(organization_id))
-        .limit(1)
-        .execute()
-    )
-    if not r.data or len(r.data) == 0:
+    rows = call_org_rpc("org_get_campaign", {
+        "p_organization_id": str(organization_id),
+        "p_user_id": user_id,
+        "p_campaign_id": str(campaign_id),
+    })
+    if not rows:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Campaign not found")
-    return r.data[0]
+    return rows[0]
 
 
 @router.post("/organizations/{organization_id}/campaigns", status_code=status.HTTP_201_CREATED)
@@ -96,25 +100,18 @@ def create_campaign(
     user_id: str = Depends(require_current_user),
 ):
     """Create a draft campaign."""
-    ensure_org_member(organization_id, user_id)
-    client = get_supabase_client()
-    row = {
-        "organization_id": str(organization_id),
-        "name": body.name.strip(),
-        "status": "draft",
-        "created_by": user_id,
-    }
-    if body.template_id is not None:
-        row["template_id"] = str(body.template_id)
-    if body.subject_line is not None:
-        row["subject_line"] = body.subject_line
-    if body.scheduled_at is not None:
-        row["scheduled_at"] = body.scheduled_at
-    r = client.table("campaigns").insert(row).execute()
-    if not r.data or len(r.data) == 0:
+    rows = call_org_rpc("org_create_campaign", {
+        "p_organization_id": str(organization_id),
+        "p_user_id": user_id,
+        "p_name": body.name,
+        "p_template_id": str(body.template_id) if body.template_id is not None else None,
+        "p_subject_line": body.subject_line,
+        "p_scheduled_at": body.scheduled_at,
+    })
+    if not rows:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Failed to create campaign")
-    return r.data[0]
+    return rows[0]
 
 
 @router.patch("/organizations/{organization_id}/campaigns/{campaign_id}")
@@ -125,38 +122,24 @@ def update_campaign(
     user_id: str = Depends(require_current_user),
 ):
     """Update a campaign (draft/scheduled/paused only). Only provided fields updated."""
-    ensure_org_member(organization_id, user_id)
-    payload = body.model_dump(exclude_unset=True)
+    payload = {k: getattr(body, k) for k in body.model_fields_set}
+    if payload.get("template_id") is not None:
+        payload["template_id"] = str(payload["template_id"])
     if payload.get("status") and payload["status"] not in ("draft", "scheduled", "paused"):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Status can only be set to draft, scheduled, or paused via API",
         )
-    client = get_supabase_client()
-    if not payload:
-        r = (
-            client.table("campaigns")
-            .select("*")
-            .eq("id", str(campaign_id))
-            .eq("organization_id", str(organization_id))
-            .limit(1)
-            .execute()
-        )
-        if not r.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, detail="Campaign not found")
-        return r.data[0]
-    r = (
-        client.table("campaigns")
-        .update(payload)
-        .eq("id", str(campaign_id))
-        .eq("organization_id", str(organization_id))
-        .execute()
-    )
-    if not r.data:
+    rows = call_org_rpc("org_update_campaign", {
+        "p_organization_id": str(organization_id),
+        "p_user_id": user_id,
+        "p_campaign_id": str(campaign_id),
+        "p_patch": payload,
+    })
+    if not rows:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Campaign not found")
-    return r.data[0]
+    return rows[0]
 
 
 @router.get("/organizations/{organization_id}/campaigns/{campaign_id}/target-rules")
@@ -166,30 +149,15 @@ def get_campaign_target_rules(
     user_id: str = Depends(require_current_user),
 ):
     """Get target rules for a campaign. Creates default row if missing."""
-    ensure_org_member(organization_id, user_id)
-    client = get_supabase_client()
-    r = (
-        client.table("campaign_target_rules")
-        .select("*")
-        .eq("campaign_id", str(campaign_id))
-        .eq("organization_id", str(organization_id))
-        .limit(1)
-        .execute()
-    )
-    if r.data and len(r.data) > 0:
-        return r.data[0]
-    row = {
-        "campaign_id": str(campaign_id),
-        "organization_id": str(organization_id),
-        "exclude_unsubscribed": True,
-        "exclude_inactive": True,
-        "exclude_bounced": False,
-    }
-    r2 = client.table("campaign_target_rules").insert(row).execute()
-    if r2.data and len(r2.data) > 0:
-        return r2.data[0]
-    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
-                        detail="Campaign not found")
+    rows = call_org_rpc("org_get_campaign_target_rules", {
+        "p_organization_id": str(organization_id),
+        "p_user_id": user_id,
+        "p_campaign_id": str(campaign_id),
+    })
+    if not rows:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail="Campaign not found")
+    return rows[0]
 
 
 @router.put("/organizations/{organization_id}/campaigns/{campaign_id}/target-rules")
@@ -200,44 +168,21 @@ def upsert_campaign_target_rules(
     user_id: str = Depends(require_current_user),
 ):
     """Create or update target rules for a campaign. One row per campaign."""
-    ensure_org_member(organization_id, user_id)
-    client = get_supabase_client()
-    r = (
-        client.table("campaign_target_rules")
-        .select("id")
-        .eq("campaign_id", str(campaign_id))
-        .eq("organization_id", str(organization_id))
-        .limit(1)
-        .execute()
-    )
-    payload = {
-        "include_tags": body.include_tags,
-        "exclude_tags": body.exclude_tags,
-        "exclude_countries": body.exclude_countries,
-        "exclude_unsubscribed": body.exclude_unsubscribed,
-        "exclude_inactive": body.exclude_inactive,
-        "exclude_bounced": body.exclude_bounced,
-    }
-    if r.data and len(r.data) > 0:
-        up = (
-            client.table("campaign_target_rules")
-            .update(payload)
-            .eq("campaign_id", str(campaign_id))
-            .eq("organization_id", str(organization_id))
-            .execute()
-        )
-        if up.data:
-            return up.data[0]
-    row = {
-        "campaign_id": str(campaign_id),
-        "organization_id": str(organization_id),
-        **payload,
-    }
-    ins = client.table("campaign_target_rules").insert(row).execute()
-    if not ins.data or len(ins.data) == 0:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
-                            detail="Failed to save target rules")
-    return ins.data[0]
+    rows = call_org_rpc("org_upsert_campaign_target_rules", {
+        "p_organization_id": str(organization_id),
+        "p_user_id": user_id,
+        "p_campaign_id": str(campaign_id),
+        "p_include_tags": body.include_tags,
+        "p_exclude_tags": body.exclude_tags,
+        "p_exclude_countries": body.exclude_countries,
+        "p_exclude_unsubscribed": body.exclude_unsubscribed,
+        "p_exclude_inactive": body.exclude_inactive,
+        "p_exclude_bounced": body.exclude_bounced,
+    })
+    if not rows:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail="Campaign not found")
+    return rows[0]
 
 
 @router.get("/organizations/{organization_id}/campaigns/{campaign_id}/recipients")
@@ -245,25 +190,27 @@ def list_campaign_recipients(
     organization_id: UUID,
     campaign_id: UUID,
     limit: int = Query(100, ge=1, le=500),
-    offset: int = Query(0, ge=0),
-    status_filter: str | None = Query(None, alias="status"),
+    cursor: str | None = Query(None, description="next_cursor from the previous page"),
+    status_filter: RecipientStatus | None = Query(None, alias="status"),
     user_id: str = Depends(require_current_user),
 ):
     """List recipients for a campaign. Optional status filter (pending, sent, delivered, bounced, opened, clicked)."""
-    ensure_org_member(organization_id, user_id)
-    client = get_supabase_client()
-    q = (
-        client.table("campaign_recipients")
-        .select("id, campaign_id, contact_id, status, sent_at, bounced_at, opened_at, clicked_at, created_at", count="exact")
-        .eq("campaign_id", str(campaign_id))
-        .eq("organization_id", str(organization_id))
-        .order("created_at", desc=True)
-        .range(offset, offset + limit - 1)
-    )
-    if status_filter:
-        q = q.eq("status", status_filter)
-    r = q.execute()
-    return {"recipients": r.data or [], "total": r.count or 0}
+    cursor_created_at, cursor_id = decode_cursor(cursor)
+    rows = call_org_rpc("org_list_campaign_recipients", {
+        "p_organization_id": str(organization_id),
+        "p_user_id": user_id,
+        "p_campaign_id": str(campaign_id),
+        "p_status": status_filter or None,
+        "p_limit": limit + 1,
+        "p_cursor_created_at": cursor_created_at,
+        "p_cursor_id": cursor_id,
+    }) or []
+    recipients, next_cursor = paginate(rows, limit)
+    return {
+        "recipients": recipients,
+        "has_more": next_cursor is not None,
+        "next_cursor": next_cursor,
+    }
 
 
 @router.post("/organizations/{organization_id}/campaigns/{campaign_id}/prepare")
@@ -310,32 +257,31 @@ def send_campaign(
 
 @router.get("/organizations/{organization_id}/campaigns/{campaign_id}/analytics")
 def get_campaign_analytics(
+    request: Request,
     organization_id: UUID,
     campaign_id: UUID,
     user_id: str = Depends(require_current_user),
 ):
     """P2-AN-001: Per-campaign aggregates — sent, opens, clicks, open_rate, click_rate (org-scoped)."""
-    ensure_org_member(organization_id, user_id)
-    client = get_supabase_client()
-    r = (
-        client.table("campaign_recipients")
-        .select("id, sent_at, opened_at, clicked_at")
-        .eq("campaign_id", str(campaign_id))
-        .eq("organization_id", str(organization_id))
-        .execute()
-    )
-    rows = r.data or []
-    sent_count = sum(1 for x in rows if x.get("sent_at"))
-    open_count = sum(1 for x in rows if x.get("opened_at"))
-    click_count = sum(1 for x in rows if x.get("clicked_at"))
+    org_id = str(organization_id)
+    camp_id = str(campaign_id)
+    rows = call_org_rpc("org_campaign_analytics", {
+        "p_organization_id": org_id,
+        "p_user_id": user_id,
+        "p_campaign_id": camp_id,
+    }) or []
+    counts = rows[0] if rows else {}
+    sent_count = counts.get("sent_count") or 0
+    open_count = counts.get("open_count") or 0
+    click_count = counts.get("click_count") or 0
     open_rate = (open_count / sent_count) if sent_count else 0.0
     click_rate = (click_count / sent_count) if sent_count else 0.0
-    return {
-        "campaign_id": str(campaign_id),
-        "organization_id": str(organization_id),
+    return json_with_etag(request, {
+        "campaign_id": camp_id,
+        "organization_id": org_id,
         "sent_count": sent_count,
         "open_count": open_count,
         "click_count": click_count,
         "open_rate": round(open_rate, 4),
         "click_rate": round(click_rate, 4),
-    }
+    })
@@ -4,7 +4,9 @@ P2-CRM-004: CSV import pipeline — upload CSV, map columns, bulk create contact
 import csv
 import io
 import json
-from datetime import datetime, timezone
+import re
+from functools import lru_cache
+from operator import itemgetter
 from uuid import UUID
 
 from fastapi import APIRouter
@@ -13,19 +15,27 @@ from fastapi import File
 from fastapi import Form
 from fastapi import HTTPException
 from fastapi import Query
+from fastapi import Request
 from fastapi import UploadFile
 from fastapi import status
+from fastapi.concurrency import run_in_threadpool
+from postgrest.exceptions import APIError
 
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 
 from app.dependencies import ensure_org_member, require_current_user
+from app.etag import json_with_etag
+from app.pagination import decode_cursor, paginate
 from app.supabase_client import get_supabase_client
+from app.validators import EmailAddress
 
 router = APIRouter()
 
 
 class CreateContactBody(BaseModel):
-    email: EmailStr | None = None
+    model_config = ConfigDict(extra="ignore", str_strip_whitespace=True, frozen=True)
+
+    email: EmailAddress | None = None
     first_name: str | None = None
     last_name: str | None = None
     mobile: str | None = None
@@ -34,9 +44,17 @@ class CreateContactBody(BaseModel):
     is_active: bool = True
     is_subscribed: bool = True
 
+    @model_validator(mode="after")
+    def _require_email_or_mobile(self) -> "CreateContactBody":
+        if not self.email and not self.mobile:
+            raise ValueError("At least one of email or mobile is required")
+        return self
+
 
 class UpdateContactBody(BaseModel):
-    email: EmailStr | None = None
+    model_config = ConfigDict(extra="ignore", str_strip_whitespace=True, frozen=True)
+
+    email: EmailAddress | None = None
     first_name: str | None = None
     last_name: str | None = None
     mobile: str | None = None
@@ -45,56 +63,62 @@ class UpdateContactBody(BaseModel):
     is_subscribed: bool | None = None
 
 
-def _contact_row(organization_id: UUID, body: CreateContactBody, created_by: str) -> dict:
-    row: dict = {
-        "organization_id": str(organization_id),
-        "source": body.source,
-        "is_active": body.is_active,
-        "is_subscribed": body.is_subscribed,
-        "created_by": created_by,
-    }
-    if body.email is not None:
-        row["email"] = body.email
-    if body.first_name is not None:
-        row["first_name"] = body.first_name
-    if body.last_name is not None:
-        row["last_name"] = body.last_name
-    if body.mobile is not None:
-        row["mobile"] = body.mobile
-    if body.country is not None:
-        row["country"] = body.country
-    if not row.get("email") and not row.get("mobile"):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="At least one of email or mobile is required",
-        )
-    return row
+def _contact_params(org_id: str, body: CreateContactBody, created_by: str) -> dict:
+    """insert_contact RPC arguments (migration 026); unset optional fields are passed as NULL."""
+    params = {f"p_{k}": v for k, v in body.model_dump().items()}
+    params["p_organization_id"] = org_id
+    params["p_created_by"] = created_by
+    return params
+
+
+def _search_pattern(term: str) -> str:
+    """ILIKE pattern for a contact search term, LIKE-escaped so % and _ match literally."""
+    like = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{like}%"
 
 
 @router.get("/organizations/{organization_id}/contacts")
 def list_contacts(
     organization_id: UUID,
     limit: int = Query(50, ge=1, le=100),
-    offset: int = Query(0, ge=0),
-    search: str | None = None,
+    cursor: str | None = Query(None, description="next_cursor from the previous page"),
+    search: str | None = Query(None, max_length=64),
+    exact_count: bool = False,
     user_id: str = Depends(require_current_user),
 ):
-    """List contacts for the org. Pagination: limit, offset. Optional search on email/name."""
-    ensure_org_member(organization_id, user_id)
+    """List contacts for the org, newest first. Keyset-paginated via cursor. Optional search
+    on email/name. total is a planner estimate unless exact_count=true (exact COUNT scans
+    every match)."""
+    org_id = str(organization_id)
+    ensure_org_member(org_id, user_id)
+    cursor_created_at, cursor_id = decode_cursor(cursor)
     client = get_supabase_client()
     q = (
         client.table("contacts")
-        .select("id, organization_id, email, first_name, last_name, mobile, country, source, is_active, is_subscribed, created_at, updated_at", count="exact")
-        .eq("organization_id", str(organization_id))
+        .select(
+            "id, organization_id, email, first_name, last_name, mobile, country, source,"
+            " is_active, is_subscribed, created_at, updated_at",
+            count="exact" if exact_count else "estimated",
+        )
+        .eq("organization_id", org_id)
         .is_("deleted_at", "null")
         .order("created_at", desc=True)
-        .range(offset, offset + limit - 1)
+        .order("id", desc=True)
+        .limit(limit + 1)
     )
-    if search and search.strip():
-        q = q.or_(
-            f"email.ilike.%{search.strip()}%,first_name.ilike.%{search.strip()}%,last_name.ilike.%{search.strip()}%")
+    if cursor_created_at:
+        # Rows strictly after the cursor in (created_at, id) DESC order; timestamps are quoted
+        # because ':' and '.' are reserved in PostgREST logic filters.
+        ts = f'"{cursor_created_at}"'
+        q = q.or_(f"created_at.lt.{ts},and(created_at.eq.{ts},id.lt.{cursor_id})")
+    # PostgREST reads * as a LIKE wildcard, so drop it from the term.
+    term = search.strip().replace("*", "") if search else ""
+    if term:
+        # One trigram-indexed column (migration 024) covers email, first and last name.
+        q = q.ilike("searchable", _search_pattern(term))
     r = q.execute()
-    return {"contacts": r.data or [], "total": r.count or 0}
+    contacts, next_cursor = paginate(r.data or [], limit)
+    return {"contacts": contacts, "total": r.count or 0, "next_cursor": next_cursor}
 
 
 @router.get("/organizations/{organization_id}/contacts/{contact_id}")
@@ -104,18 +128,19 @@ def get_contact(
     user_id: str = Depends(require_current_user),
 ):
     """Get a single contact by id. 404 if not in org or deleted."""
-    ensure_org_member(organization_id, user_id)
+    org_id = str(organization_id)
+    ensure_org_member(org_id, user_id)
     client = get_supabase_client()
     r = (
         client.table("contacts")
         .select("*")
         .eq("id", str(contact_id))
-        .eq("organization_id", str(organization_id))
+        .eq("organization_id", org_id)
         .is_("deleted_at", "null")
         .limit(1)
         .execute()
     )
-    if not r.data or len(r.data) == 0:
+    if not r.data:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Contact not found")
     return r.data[0]
@@ -128,11 +153,16 @@ def create_contact(
     user_id: str = Depends(require_current_user),
 ):
     """Create a contact. At least email or mobile required."""
-    ensure_org_member(organization_id, user_id)
-    row = _contact_row(organization_id, body, user_id)
+    org_id = str(organization_id)
+    ensure_org_member(org_id, user_id)
     client = get_supabase_client()
-    r = client.table("contacts").insert(row).execute()
-    if not r.data or len(r.data) == 0:
+    try:
+        r = client.rpc("insert_contact", _contact_params(org_id, body, user_id)).execute()
+    except APIError as e:
+        if e.code != "23505":
+            raise
+        r = None
+    if not r or not r.data:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Create failed (e.g. duplicate email in org)",
@@ -147,33 +177,24 @@ def update_contact(
     body: UpdateContactBody,
     user_id: str = Depends(require_current_user),
 ):
-    """Update a contact. Only provided fields are updated."""
-    ensure_org_member(organization_id, user_id)
-    client = get_supabase_client()
+    """Update a contact. Only provided fields are updated; an empty body is rejected
+    (use GET to re-read a contact)."""
+    org_id = str(organization_id)
+    ensure_org_member(org_id, user_id)
     payload = body.model_dump(exclude_unset=True)
     if not payload:
-        r = (
-            client.table("contacts")
-            .select("*")
-            .eq("id", str(contact_id))
-            .eq("organization_id", str(organization_id))
-            .is_("deleted_at", "null")
-            .limit(1)
-            .execute()
-        )
-        if not r.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, detail="Contact not found")
-        return r.data[0]
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="No fields to update")
+    client = get_supabase_client()
     r = (
         client.table("contacts")
         .update(payload)
         .eq("id", str(contact_id))
-        .eq("organization_id", str(organization_id))
+        .eq("organization_id", org_id)
         .is_("deleted_at", "null")
         .execute()
     )
-    if not r.data or len(r.data) == 0:
+    if not r.data:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Contact not found")
     return r.data[0]
@@ -186,17 +207,14 @@ def delete_contact(
     user_id: str = Depends(require_current_user),
 ):
     """Soft-delete a contact (set deleted_at)."""
-    ensure_org_member(organization_id, user_id)
+    org_id = str(organization_id)
+    ensure_org_member(org_id, user_id)
     client = get_supabase_client()
-    r = (
-        client.table("contacts")
-        .update({"deleted_at": datetime.now(timezone.utc).isoformat()})
-        .eq("id", str(contact_id))
-        .eq("organization_id", str(organization_id))
-        .is_("deleted_at", "null")
-        .execute()
-    )
-    if not r.data or len(r.data) == 0:
+    r = client.rpc(
+        "soft_delete_contact",
+        {"p_contact_id": str(contact_id), "p_organization_id": org_id},
+    ).execute()
+    if not r.data:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Contact not found")
     return None
@@ -205,86 +223,124 @@ def delete_contact(
 CONTACT_IMPORT_FIELDS = ("email", "first_name",
                          "last_name", "mobile", "country")
 MAX_IMPORT_ROWS = 2000
+IMPORT_INSERT_CHUNK = 500
+# Generous per-row budget (~2.5 KiB) so a full MAX_IMPORT_ROWS file always fits.
+MAX_IMPORT_BYTES = 5 * 1024 * 1024
+_UPLOAD_READ_CHUNK = 64 * 1024
 
-_HEADER_ALIASES = {
-    "email": ["email", "e-mail", "mail"],
-    "first_name": ["first_name", "first name", "firstname", "given name"],
-    "last_name": ["last_name", "last name", "lastname", "surname", "family name"],
-    "mobile": ["mobile", "phone", "telephone", "cell", "number"],
-    "country": ["country", "country code", "location"],
-}
+_HEADER_ALIASES: tuple[tuple[str, tuple[str, ...]], ...] = (
+    ("email", ("email", "e-mail", "mail")),
+    ("first_name", ("first_name", "first name", "firstname", "given name")),
+    ("last_name", ("last_name", "last name", "lastname", "surname", "family name")),
+    ("mobile", ("mobile", "phone", "telephone", "cell", "number")),
+    ("country", ("country", "country code", "location")),
+)
 
 
+@lru_cache(maxsize=256)
 def _normalize_header(h: str) -> str:
     return (h or "").strip().lower().replace(" ", "_").replace("-", "_")
 
 
+# Normalized alias -> field, built once so inference is one dict lookup per header.
+_ALIAS_TO_FIELD: dict[str, str] = {}
+for _field, _aliases in _HEADER_ALIASES:
+    for _alias in (*_aliases, _field, _field.replace("_", "")):
+        _ALIAS_TO_FIELD.setdefault(_normalize_header(_alias), _field)
+del _field, _aliases, _alias
+
+
 def _infer_column_mapping(csv_headers: list[str]) -> dict[str, int]:
-    """Map our field names to column indices using CSV headers. Returns field_name -> index."""
+    """Map our field names to column indices using CSV headers. Returns field_name -> index.
+    The first matching column wins for each field."""
     mapping: dict[str, int] = {}
-    normalized_headers = [_normalize_header(h) for h in csv_headers]
-    for field in CONTACT_IMPORT_FIELDS:
-        for alias in _HEADER_ALIASES.get(field, [field]):
-            norm = _normalize_header(alias)
-            for i, nh in enumerate(normalized_headers):
-                if nh == norm or nh == field.replace("_", ""):
-                    mapping[field] = i
-                    break
-            if field in mapping:
-                break
+    for i, h in enumerate(csv_headers):
+        field = _ALIAS_TO_FIELD.get(_normalize_header(h))
+        if field and field not in mapping:
+            mapping[field] = i
     return mapping
 
 
+def _insert_import_chunk(client, chunk: list[tuple[int, dict]], errors: list[dict]) -> int:
+    """Insert (row_number, payload) pairs in one request via import_contacts (migration 019),
+    which skips duplicate emails instead of failing. Skipped rows are found by diffing the
+    returned emails against the chunk. If the batch errors for another reason, retry row by
+    row so each failure is reported against its CSV row."""
+    try:
+        r = client.rpc("import_contacts", {"p_rows": [payload for _, payload in chunk]}).execute()
+    except Exception:
+        return _insert_import_rows_one_by_one(client, chunk, errors)
+    inserted = {(row.get("email") or "").lower() for row in (r.data or []) if row.get("email")}
+    created = 0
+    seen: set[str] = set()
+    for one_indexed, payload in chunk:
+        email = payload.get("email")
+        if not email:
+            created += 1
+            continue
+        key = email.lower()
+        if key in inserted and key not in seen:
+            seen.add(key)
+            created += 1
+        else:
+            errors.append({"row": one_indexed, "reason": "Duplicate email"})
+    return created
+
+
+def _insert_import_rows_one_by_one(
+    client, chunk: list[tuple[int, dict]], errors: list[dict],
+) -> int:
+    created = 0
+    for one_indexed, payload in chunk:
+        try:
+            r = client.table("contacts").insert(payload).execute()
+            if r.data:
+                created += 1
+            else:
+                errors.append(
+                    {"row": one_indexed,
+                        "reason": "Insert failed (e.g. duplicate email)"}
+                )
+        except Exception as e:
+            errors.append({"row": one_indexed, "reason": str(e)[:200]})
+    return created
+
+
+_EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+
 def _validate_email(s: str | None) -> bool:
-    if not s or not s.strip():
+    """Cheap shape check for CSV emails (one precompiled regex match)."""
+    if not s:
         return False
-    s = s.strip()
-    return "@" in s and "." in s and len(s) > 3
+    return _EMAIL_RE.match(s.strip()) is not None
 
 
-@router.post("/organizations/{organization_id}/contacts/import")
-def import_contacts_csv(
+def _parse_import_csv(
+    content: bytes,
+    column_mapping: str | None,
+    source: str,
     organization_id: UUID,
-    file: UploadFile = File(...,
-                            description="CSV file (headers in first row)"),
-    column_mapping: str | None = Form(
-        None, description="Optional JSON: our_field -> CSV header"),
-    source: str = Form(
-        "csv_import", description="Source label for imported contacts"),
-    user_id: str = Depends(require_current_user),
-):
-    """P2-CRM-004: Upload CSV, map columns, create contacts under org. Returns created/failed + errors."""
-    ensure_org_member(organization_id, user_id)
-    if not file.filename or not file.filename.lower().endswith(".csv"):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="File must be a CSV (.csv)",
-        )
-    content = file.file.read()
+    user_id: str,
+) -> tuple[list[tuple[int, dict]], list[dict], int]:
+    """Decode, map and validate an uploaded CSV (CPU-bound; run in a worker thread).
+    Returns (pending (row_number, payload) pairs, row errors, data rows seen)."""
     try:
-        text = content.decode("utf-8")
+        # utf-8-sig also strips a leading BOM (Excel exports) so the first header matches.
+        text = content.decode("utf-8-sig")
     except UnicodeDecodeError:
-        try:
-            text = content.decode("utf-8-sig")
-        except Exception:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="CSV must be UTF-8 encoded",
-            )
-    reader = csv.reader(io.StringIO(text))
-    rows = list(reader)
-    if not rows:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="CSV is empty",
-        )
-    headers = [h.strip() for h in rows[0]]
-    data_rows = rows[1:]
-    if len(data_rows) > MAX_IMPORT_ROWS:
+            detail="CSV must be UTF-8 encoded",
+        ) from None
+    reader = csv.reader(io.StringIO(text))
+    header_row = next(reader, None)
+    if header_row is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Maximum {MAX_IMPORT_ROWS} rows per import",
+            detail="CSV is empty",
         )
+    headers = [h.strip() for h in header_row]
     if column_mapping:
         try:
             user_map = json.loads(column_mapping)
@@ -311,24 +367,41 @@ def import_contacts_csv(
                 "email, first_name, last_name, mobile, country"
             ),
         )
-    client = get_supabase_client()
-    created = 0
     errors: list[dict] = []
-    for row_index, row in enumerate(data_rows):
+    pending: list[tuple[int, dict]] = []
+    total_rows = 0
+    # Mapped fields and their column indices, resolved once. Full-width rows are sliced by a
+    # C-level itemgetter; the trailing duplicate index keeps its result a tuple for one column.
+    fields = tuple(field for field in CONTACT_IMPORT_FIELDS if field in field_to_index)
+    idxs = tuple(field_to_index[field] for field in fields)
+    width = max(idxs) + 1
+    get_cells = itemgetter(*idxs, idxs[0])
+    base_payload = {
+        "organization_id": str(organization_id),
+        "source": source,
+        "is_active": True,
+        "is_subscribed": True,
+        "created_by": user_id,
+    }
+    # Rows are parsed lazily; oversized files are rejected as soon as the limit is passed.
+    for row_index, row in enumerate(reader):
+        if row_index >= MAX_IMPORT_ROWS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Maximum {MAX_IMPORT_ROWS} rows per import",
+            )
+        total_rows += 1
         one_indexed = row_index + 2
-        if not any(cell and str(cell).strip() for cell in row):
+        # csv.reader yields str cells; isspace() avoids a strip() copy per cell.
+        if not any(cell and not cell.isspace() for cell in row):
             continue
-        email_val = None
-        if "email" in field_to_index:
-            idx = field_to_index["email"]
-            if idx < len(row) and row[idx] is not None:
-                email_val = str(row[idx]).strip() or None
-        mobile_val = None
-        if "mobile" in field_to_index:
-            idx = field_to_index["mobile"]
-            if idx < len(row) and row[idx] is not None:
-                mobile_val = str(row[idx]).strip() or None
-        if not email_val and not mobile_val:
+        if len(row) >= width:
+            cells = get_cells(row)
+        else:
+            cells = tuple(row[idx] if idx < len(row) else "" for idx in idxs)
+        vals = {field: val for field, cell in zip(fields, cells) if (val := cell.strip())}
+        email_val = vals.get("email")
+        if not email_val and "mobile" not in vals:
             errors.append(
                 {"row": one_indexed, "reason": "Missing email and mobile"})
             continue
@@ -336,69 +409,95 @@ def import_contacts_csv(
             errors.append(
                 {"row": one_indexed, "reason": "Invalid email format"})
             continue
-        payload: dict = {
-            "organization_id": str(organization_id),
-            "source": source,
-            "is_active": True,
-            "is_subscribed": True,
-            "created_by": user_id,
-        }
-        if email_val:
-            payload["email"] = email_val
-        if mobile_val:
-            payload["mobile"] = mobile_val
-        for field in ("first_name", "last_name", "country"):
-            if field in field_to_index:
-                idx = field_to_index[field]
-                if idx < len(row) and row[idx] is not None:
-                    val = str(row[idx]).strip() or None
-                    if val:
-                        payload[field] = val
-        try:
-            r = client.table("contacts").insert(payload).execute()
-            if r.data and len(r.data) > 0:
-                created += 1
-            else:
-                errors.append(
-                    {"row": one_indexed,
-                        "reason": "Insert failed (e.g. duplicate email)"}
-                )
-        except Exception as e:
-            errors.append({"row": one_indexed, "reason": str(e)[:200]})
+        payload = base_payload.copy()
+        payload.update(vals)
+        pending.append((one_indexed, payload))
+    return pending, errors, total_rows
+
+
+def _insert_import_rows(pending: list[tuple[int, dict]], errors: list[dict]) -> int:
+    """Insert validated rows in IMPORT_INSERT_CHUNK batches. Returns number created."""
+    client = get_supabase_client()
+    created = 0
+    for start in range(0, len(pending), IMPORT_INSERT_CHUNK):
+        created += _insert_import_chunk(
+            client, pending[start:start + IMPORT_INSERT_CHUNK], errors)
+    return created
+
+
+@router.post("/organizations/{organization_id}/contacts/import")
+async def import_contacts_csv(
+    organization_id: UUID,
+    file: UploadFile = File(...,
+                            description="CSV file (headers in first row)"),
+    column_mapping: str | None = Form(
+        None, description="Optional JSON: our_field -> CSV header"),
+    source: str = Form(
+        "csv_import", description="Source label for imported contacts"),
+    user_id: str = Depends(require_current_user),
+):
+    """P2-CRM-004: Upload CSV, map columns, create contacts under org.
+    Returns created/failed + errors.
+    Async so the upload streams without holding a worker thread; parsing and Supabase calls
+    (blocking) run in the threadpool."""
+    await run_in_threadpool(ensure_org_member, organization_id, user_id)
+    if not file.filename or not file.filename.lower().endswith(".csv"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="File must be a CSV (.csv)",
+        )
+    content = bytearray()
+    while chunk := await file.read(_UPLOAD_READ_CHUNK):
+        content.extend(chunk)
+        if len(content) > MAX_IMPORT_BYTES:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"CSV must be at most {MAX_IMPORT_BYTES // (1024 * 1024)} MB",
+            )
+    pending, errors, total_rows = await run_in_threadpool(
+        _parse_import_csv, bytes(content), column_mapping, source, organization_id, user_id)
+    created = await run_in_threadpool(_insert_import_rows, pending, errors)
+    errors.sort(key=lambda e: e["row"])
     return {
         "created": created,
         "failed": len(errors),
-        "total": len(data_rows),
+        "total": total_rows,
         "errors": errors[:100],
     }
 
 
 class CreateTagBody(BaseModel):
+    model_config = ConfigDict(extra="ignore", str_strip_whitespace=True, frozen=True)
+
     name: str
     color: str | None = None
 
 
 class UpdateTagBody(BaseModel):
+    model_config = ConfigDict(extra="ignore", str_strip_whitespace=True, frozen=True)
+
     name: str | None = None
     color: str | None = None
 
 
 @router.get("/organizations/{organization_id}/contacts/tags/list")
 def list_contact_tags(
+    request: Request,
     organization_id: UUID,
     user_id: str = Depends(require_current_user),
 ):
-    """List all contact tags for the org."""
-    ensure_org_member(organization_id, user_id)
+    """List all contact tags for the org. Sends an ETag (304 on If-None-Match match)."""
+    org_id = str(organization_id)
+    ensure_org_member(org_id, user_id)
     client = get_supabase_client()
     r = (
         client.table("contact_tags")
         .select("id, organization_id, name, color, created_at")
-        .eq("organization_id", str(organization_id))
+        .eq("organization_id", org_id)
         .order("name")
         .execute()
     )
-    return {"tags": r.data or []}
+    return json_with_etag(request, {"tags": r.data or []})
 
 
 @router.post("/organizations/{organization_id}/contacts/tags", status_code=status.HTTP_201_CREATED)
@@ -408,16 +507,21 @@ def create_contact_tag(
     user_id: str = Depends(require_current_user),
 ):
     """Create a contact tag. Name must be unique per org."""
-    ensure_org_member(organization_id, user_id)
+    org_id = str(organization_id)
+    ensure_org_member(org_id, user_id)
     client = get_supabase_client()
-    row = {
-        "organization_id": str(organization_id),
-        "name": body.name.strip(),
-        "color": body.color or None,
-        "created_by": user_id,
-    }
-    r = client.table("contact_tags").insert(row).execute()
-    if not r.data or len(r.data) == 0:
+    try:
+        r = client.rpc("insert_contact_tag", {
+            "p_organization_id": org_id,
+            "p_name": body.name,
+            "p_color": body.color or None,
+            "p_created_by": user_id,
+        }).execute()
+    except APIError as e:
+        if e.code != "23505":
+            raise
+        r = None
+    if not r or not r.data:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Create failed (e.g. tag name already exists in org)",
@@ -432,29 +536,19 @@ def update_contact_tag(
     body: UpdateTagBody,
     user_id: str = Depends(require_current_user),
 ):
-    """Update a contact tag."""
-    ensure_org_member(organization_id, user_id)
+    """Update a contact tag. An empty body is rejected."""
+    org_id = str(organization_id)
+    ensure_org_member(org_id, user_id)
     payload = body.model_dump(exclude_unset=True)
     if not payload:
-        client = get_supabase_client()
-        r = (
-            client.table("contact_tags")
-            .select("*")
-            .eq("id", str(tag_id))
-            .eq("organization_id", str(organization_id))
-            .limit(1)
-            .execute()
-        )
-        if not r.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, detail="Tag not found")
-        return r.data[0]
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="No fields to update")
     client = get_supabase_client()
     r = (
         client.table("contact_tags")
         .update(payload)
         .eq("id", str(tag_id))
-        .eq("organization_id", str(organization_id))
+        .eq("organization_id", org_id)
         .execute()
     )
     if not r.data:
@@ -470,24 +564,31 @@ def delete_contact_tag(
     user_id: str = Depends(require_current_user),
 ):
     """Delete a contact tag. Assignments are cascade-deleted."""
-    ensure_org_member(organization_id, user_id)
+    org_id = str(organization_id)
+    ensure_org_member(org_id, user_id)
     client = get_supabase_client()
-    r = (
+    (
         client.table("contact_tags")
         .delete()
         .eq("id", str(tag_id))
-        .eq("organization_id", str(organization_id))
+        .eq("organization_id", org_id)
         .execute()
     )
-    if r.data is None and (not r.data or len(r.data) == 0):
-        pass
     return None
 
 
 class AssignTagBody(BaseModel):
+    model_config = ConfigDict(extra="ignore", str_strip_whitespace=True, frozen=True)
+
     tag_id: UUID
 
 
+class AssignTagsBody(BaseModel):
+    model_config = ConfigDict(extra="ignore", str_strip_whitespace=True, frozen=True)
+
+    tag_ids: list[UUID] = Field(..., min_length=1, max_length=100)
+
+
 @router.get("/organizations/{organization_id}/contacts/{contact_id}/tags")
 def list_contact_tag_assignments(
     organization_id: UUID,
@@ -495,23 +596,20 @@ def list_contact_tag_assignments(
     user_id: str = Depends(require_current_user),
 ):
     """List tags assigned to a contact."""
-    ensure_org_member(organization_id, user_id)
+    org_id = str(organization_id)
+    ensure_org_member(org_id, user_id)
     client = get_supabase_client()
     r = (
         client.table("contact_tag_assignments")
-        .select("id, contact_id, tag_id, assigned_at")
+        .select("id, contact_id, tag_id, assigned_at, contact_tags(id, name, color)")
         .eq("contact_id", str(contact_id))
-        .eq("organization_id", str(organization_id))
+        .eq("organization_id", org_id)
         .execute()
     )
-    tag_ids = [a["tag_id"] for a in (r.data or [])]
-    if not tag_ids:
-        return {"assignments": [], "tags": []}
-    tags_r = client.table("contact_tags").select(
-        "id, name, color").in_("id", tag_ids).execute()
-    tags_by_id = {t["id"]: t for t in (tags_r.data or [])}
-    tags = [tags_by_id.get(a["tag_id"], {}) for a in (r.data or [])]
-    return {"assignments": r.data or [], "tags": tags}
+    # Tags come back embedded via the tag_id FK; split them out to keep the response shape.
+    assignments = r.data or []
+    tags = [a.pop("contact_tags", None) or {} for a in assignments]
+    return {"assignments": assignments, "tags": tags}
 
 
 @router.post("/organizations/{organization_id}/contacts/{contact_id}/tags", status_code=status.HTTP_201_CREATED)
@@ -522,16 +620,17 @@ def assign_tag_to_contact(
     user_id: str = Depends(require_current_user),
 ):
     """Assign a tag to a contact. Tag must belong to same org."""
-    ensure_org_member(organization_id, user_id)
+    org_id = str(organization_id)
+    ensure_org_member(org_id, user_id)
     client = get_supabase_client()
     row = {
         "contact_id": str(contact_id),
         "tag_id": str(body.tag_id),
-        "organization_id": str(organization_id),
+        "organization_id": org_id,
         "assigned_by": user_id,
     }
     r = client.table("contact_tag_assignments").insert(row).execute()
-    if not r.data or len(r.data) == 0:
+    if not r.data:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Assign failed (e.g. contact/tag not in org or already assigned)",
@@ -539,7 +638,34 @@ def assign_tag_to_contact(
     return r.data[0]
 
 
-@router.delete("/organizations/{organization_id}/contacts/{contact_id}/tags/{tag_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.post(
+    "/organizations/{organization_id}/contacts/{contact_id}/tags/bulk",
+    status_code=status.HTTP_201_CREATED,
+)
+def assign_tags_to_contact(
+    organization_id: UUID,
+    contact_id: UUID,
+    body: AssignTagsBody,
+    user_id: str = Depends(require_current_user),
+):
+    """Assign several tags to a contact in one call. Tags outside the org and tags already
+    assigned are skipped; returns the assignments created."""
+    org_id = str(organization_id)
+    ensure_org_member(org_id, user_id)
+    client = get_supabase_client()
+    r = client.rpc("assign_contact_tags", {
+        "p_organization_id": org_id,
+        "p_contact_id": str(contact_id),
+        "p_tag_ids": [str(t) for t in dict.fromkeys(body.tag_ids)],
+        "p_user_id": user_id,
+    }).execute()
+    return {"assignments": r.data or []}
+
+
+@router.delete(
+    "/organizations/{organization_id}/contacts/{contact_id}/tags/{tag_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+)
 def unassign_tag_from_contact(
     organization_id: UUID,
     contact_id: UUID,
@@ -547,8 +673,9 @@ def unassign_tag_from_contact(
     user_id: str = Depends(require_current_user),
 ):
     """Remove a tag from a contact."""
-    ensure_org_member(organization_id, user_id)
+    org_id = str(organization_id)
+    ensure_org_member(org_id, user_id)
     client = get_supabase_client()
     client.table("contact_tag_assignments").delete().eq("contact_id", str(contact_id)).eq(
-        "tag_id", str(tag_id)).eq("organization_id", str(organization_id)).execute()
+        "tag_id", str(tag_id)).eq("organization_id", org_id).execute()
     return None
@@ -1,5 +1,7 @@
 """P2-SES-003: Internal/cron endpoints — process scheduled campaigns. Not for frontend."""
 
+import hmac
+
 from fastapi import APIRouter, Header, HTTPException, Query, status
 
 from app.config import get_settings
@@ -14,12 +16,14 @@ router = APIRouter()
 def _check_cron_secret(x_cron_secret: str | None = Header(None, alias="X-Cron-Secret")) -> None:
     """Raise 401 if X-Cron-Secret missing or wrong; 503 if cron not configured."""
     settings = get_settings()
-    if not (settings.cron_secret or "").strip():
+    if not settings.cron_secret_bytes:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Scheduler not configured (CRON_SECRET not set)",
         )
-    if not x_cron_secret or x_cron_secret.strip() != settings.cron_secret.strip():
+    if not x_cron_secret or not hmac.compare_digest(
+        x_cron_secret.strip().encode(), settings.cron_secret_bytes
+    ):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or missing X-Cron-Secret",
@@ -31,14 +35,17 @@ def trigger_process_scheduled_campaigns(
     x_cron_secret: str | None = Header(None, alias="X-Cron-Secret"),
     max_campaigns: int = Query(5, ge=1, le=20),
     rate_per_sec: float = Query(DEFAULT_RATE_PER_SEC, ge=0.1, le=14),
+    concurrency: int = Query(3, ge=1, le=10),
 ):
     """
     P2-SES-003: Process campaigns with status=scheduled and scheduled_at <= now().
     Call this from a cron job every 1–5 minutes. Requires X-Cron-Secret header.
+    Up to `concurrency` campaigns send in parallel, sharing the rate_per_sec budget.
     """
     _check_cron_secret(x_cron_secret)
     processed = process_scheduled_campaigns(
         max_campaigns=max_campaigns,
         rate_per_sec=rate_per_sec,
+        concurrency=concurrency,
     )
     return {"processed": processed}
@@ -3,27 +3,33 @@
 from typing import Literal
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from pydantic import BaseModel, EmailStr
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from postgrest.exceptions import APIError
+from pydantic import BaseModel, ConfigDict
 
-from app.dependencies import ensure_org_admin, require_current_user
+from app.dependencies import require_org_member
+from app.etag import json_with_etag
 from app.supabase_client import get_supabase_client
+from app.validators import EmailAddress
 
 router = APIRouter()
 
 
 class CreateInviteBody(BaseModel):
-    email: EmailStr
+    model_config = ConfigDict(extra="ignore", str_strip_whitespace=True, frozen=True)
+
+    email: EmailAddress
     role: Literal["admin", "member"] = "member"
 
 
 @router.get("/organizations/{organization_id}/invites")
 def list_invites(
+    request: Request,
     organization_id: UUID,
-    user_id: str = Depends(require_current_user),
+    membership: dict = Depends(require_org_member(("owner", "admin"))),
 ):
-    """List pending invites for the organization. Requires auth and org admin."""
-    ensure_org_admin(organization_id, user_id)
+    """List pending invites for the organization. Requires auth and org admin.
+    Sends an ETag; a matching If-None-Match gets 304 with no body."""
     client = get_supabase_client()
     r = (
         client.table("organization_invites")
@@ -31,26 +37,29 @@ def list_invites(
         .eq("organization_id", str(organization_id))
         .execute()
     )
-    return {"invites": r.data or []}
+    return json_with_etag(request, {"invites": r.data or []})
 
 
 @router.post("/organizations/{organization_id}/invites", status_code=status.HTTP_201_CREATED)
 def create_invite(
     organization_id: UUID,
     body: CreateInviteBody,
-    user_id: str = Depends(require_current_user),
+    membership: dict = Depends(require_org_member(("owner", "admin"))),
 ):
     """Create a pending invite. Admin/owner only. Invitation email TBD Phase 2."""
-    ensure_org_admin(organization_id, user_id)
     client = get_supabase_client()
-    row = {
-        "organization_id": str(organization_id),
-        "email": body.email,
-        "role": body.role,
-        "invited_by_user_id": user_id,
-    }
-    r = client.table("organization_invites").insert(row).execute()
-    if not r.data or len(r.data) == 0:
+    try:
+        r = client.rpc("insert_organization_invite", {
+            "p_organization_id": str(organization_id),
+            "p_email": body.email,
+            "p_role": body.role,
+            "p_invited_by_user_id": membership["user_id"],
+        }).execute()
+    except APIError as e:
+        if e.code != "23505":
+            raise
+        r = None
+    if not r or not r.data:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invite failed (maybe already invited or already a member)",
@@ -1,114 +1,86 @@
 """Onboarding: create first organization + membership for authenticated user (P1-AUTH-003)."""
 
-import re
+import string
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from pydantic import BaseModel, Field
+from postgrest.exceptions import APIError
+from pydantic import BaseModel, ConfigDict, Field
 
 from app.dependencies import require_current_user
 from app.supabase_client import get_supabase_client
 
 router = APIRouter()
 
-SLUG_PATTERN = re.compile(r"^[a-z0-9][a-z0-9-]{0,62}[a-z0-9]$|^[a-z0-9]$")
+# Slug grammar: ^[a-z0-9][a-z0-9-]{0,62}[a-z0-9]$|^[a-z0-9]$ — checked without a regex.
+_SLUG_CHARS = frozenset(string.ascii_lowercase + string.digits + "-")
+
+
+def _is_valid_slug(slug: str) -> bool:
+    return (
+        0 < len(slug) <= 64
+        and slug[0] != "-"
+        and slug[-1] != "-"
+        and _SLUG_CHARS.issuperset(slug)
+    )
 
 
 class OnboardBody(BaseModel):
+    model_config = ConfigDict(extra="ignore", str_strip_whitespace=True, frozen=True)
+
     name: str = Field(..., min_length=1, max_length=500)
     slug: str = Field(..., min_length=1, max_length=64)
 
 
 @router.get("/me", status_code=200)
-async def get_me_and_organizations(
+def get_me_and_organizations(
     user_id: str = Depends(require_current_user),
 ):
-    """Return current user id and list of organizations they belong to (for app shell / org switcher)."""
+    """Return current user id and list of organizations they belong to
+    (for app shell / org switcher)."""
     client = get_supabase_client()
     members = (
         client.table("organization_members")
-        .select("organization_id, role")
+        .select("role, organizations(id, name, slug, created_at)")
         .eq("user_id", user_id)
         .execute()
     )
-    org_ids = [m["organization_id"] for m in (members.data or [])]
-    if not org_ids:
-        return {"user_id": user_id, "organizations": []}
-    orgs = (
-        client.table("organizations")
-        .select("id, name, slug, created_at")
-        .in_("id", org_ids)
-        .execute()
-    )
-    org_list = list(orgs.data or [])
-    by_id = {m["organization_id"]: m["role"] for m in (members.data or [])}
-    for o in org_list:
-        o["role"] = by_id.get(o["id"], "member")
+    org_list = [
+        {**m["organizations"], "role": m["role"]}
+        for m in (members.data or []) if m.get("organizations")
+    ]
     return {"user_id": user_id, "organizations": org_list}
 
 
 @router.post("", status_code=201)
-async def create_workspace(
+def create_workspace(
     body: OnboardBody,
     user_id: str = Depends(require_current_user),
 ):
-    """Create the user's first organization and add them as owner. Idempotent if already a member of any org."""
-    name = body.name.strip()
-    slug = body.slug.strip().lower()
-    if not SLUG_PATTERN.match(slug):
+    """Create the user's first organization and add them as owner.
+    Idempotent if already a member of any org.
+    One RPC (migration 022): org + membership are created in a single transaction."""
+    name = body.name
+    slug = body.slug.lower()
+    if not _is_valid_slug(slug):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="slug must be lowercase alphanumeric and hyphens, 1–64 chars",
         )
     client = get_supabase_client()
-    members = (
-        client.table("organization_members")
-        .select("organization_id")
-        .eq("user_id", user_id)
-        .limit(1)
-        .execute()
-    )
-    if members.data and len(members.data) > 0:
-        org_id = members.data[0]["organization_id"]
-        org = (
-            client.table("organizations")
-            .select("*")
-            .eq("id", org_id)
-            .limit(1)
-            .execute()
-        )
-        if org.data:
-            return {"organization": org.data[0], "already_exists": True}
-
-    existing = (
-        client.table("organizations")
-        .select("id")
-        .eq("slug", slug)
-        .limit(1)
-        .execute()
-    )
-    if existing.data and len(existing.data) > 0:
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail="slug already taken",
-        )
-
-    org_row = (
-        client.table("organizations")
-        .insert({"name": name, "slug": slug})
-        .execute()
-    )
-    if not org_row.data or len(org_row.data) == 0:
+    try:
+        r = client.rpc(
+            "onboard_workspace", {"p_user_id": user_id, "p_name": name, "p_slug": slug}
+        ).execute()
+    except APIError as e:
+        if e.code == "23505":
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="slug already taken",
+            ) from None
+        raise
+    if not r.data or not r.data.get("organization"):
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to create organization",
         )
-    org = org_row.data[0]
-    org_id = org["id"]
-    client.table("organization_members").insert(
-        {
-            "organization_id": org_id,
-            "user_id": user_id,
-            "role": "owner",
-        }
-    ).execute()
-    return {"organization": org, "already_exists": False}
+    return r.data
@@ -5,6 +5,9 @@ from fastapi import APIRouter
 from app.api.v1 import activity, campaigns, contacts, health, internal, invites, onboard, templates, track
 
 router = APIRouter()
+# include_router flattens everything into one route list that Starlette scans in order, so
+# the highest-volume public endpoints (open pixel / click redirect) are registered first.
+router.include_router(track.router, prefix="/track", tags=["track"])
 router.include_router(health.router, prefix="/health", tags=["health"])
 router.include_router(onboard.router, prefix="/onboard", tags=["onboard"])
 router.include_router(activity.router, tags=["activity"])
@@ -13,4 +16,3 @@ router.include_router(contacts.router, tags=["contacts"])
 router.include_router(templates.router, tags=["templates"])
 router.include_router(campaigns.router, tags=["campaigns"])
 router.include_router(internal.router, prefix="/internal", tags=["internal"])
-router.include_router(track.router, prefix="/track", tags=["track"])
@@ -5,11 +5,18 @@ from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from pydantic import BaseModel
 
-from app.dependencies import ensure_org_member, require_current_user
+from app.cache import TTLCache
+from app.dependencies import call_org_rpc, require_current_user, require_org_member
 from app.supabase_client import get_supabase_client
 
 router = APIRouter()
 
+# organization_id -> number of org templates; dropped on create/delete, else stale for <= 30s.
+_template_count_cache = TTLCache(maxsize=5000, ttl=30)
+# Global admin-provided templates (same for every org). Seeded via SQL, so a 60s TTL is
+# the only invalidation needed.
+_admin_templates_cache = TTLCache(maxsize=1, ttl=60)
+
 
 class CreateTemplateBody(BaseModel):
     name: str
@@ -35,31 +42,24 @@ def list_templates(
     user_id: str = Depends(require_current_user),
 ):
     """List templates: org's user-created + optionally admin-provided (organization_id IS NULL)."""
-    ensure_org_member(organization_id, user_id)
-    client = get_supabase_client()
-    q = (
-        client.table("templates")
-        .select("id, organization_id, name, admin_provided, subject_line, created_at, updated_at", count="exact")
-        .eq("organization_id", str(organization_id))
-        .order("updated_at", desc=True)
-        .range(offset, offset + limit - 1)
-    )
-    r = q.execute()
-    items = list(r.data or [])
-    total = r.count or 0
-    if include_admin_provided:
-        r2 = (
-            client.table("templates")
-            .select("id, organization_id, name, admin_provided, subject_line, created_at, updated_at")
-            .is_("organization_id", "null")
-            .eq("admin_provided", True)
-            .order("name")
-            .execute()
-        )
-        admin = list(r2.data or [])
-        items = items + admin
-        total = total + len(admin)
-    return {"templates": items, "total": total}
+    org_id = str(organization_id)
+    org_total = _template_count_cache.get(org_id)
+    admin = _admin_templates_cache.get("admin") if include_admin_provided else []
+    result = call_org_rpc("org_list_templates", {
+        "p_organization_id": org_id,
+        "p_user_id": user_id,
+        "p_limit": limit,
+        "p_offset": offset,
+        "p_include_admin": admin is None,
+        "p_with_total": org_total is None,
+    }) or {}
+    if org_total is None:
+        org_total = result.get("org_total") or 0
+        _template_count_cache.set(org_id, org_total)
+    if admin is None:
+        admin = result.get("admin_templates") or []
+        _admin_templates_cache.set("admin", admin)
+    return {"templates": (result.get("templates") or []) + admin, "total": org_total + len(admin)}
 
 
 @router.get("/organizations/{organization_id}/templates/{template_id}")
@@ -69,33 +69,25 @@ def get_template(
     user_id: str = Depends(require_current_user),
 ):
     """Get a template by id. Readable if org-owned or admin_provided (global)."""
-    ensure_org_member(organization_id, user_id)
-    client = get_supabase_client()
-    r = (
-        client.table("templates")
-        .select("*")
-        .eq("id", str(template_id))
-        .limit(1)
-        .execute()
-    )
-    if not r.data or len(r.data) == 0:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Template not found")
-    row = r.data[0]
-    if row.get("organization_id") and str(row["organization_id"]) != str(organization_id):
+    rows = call_org_rpc("org_get_template", {
+        "p_organization_id": str(organization_id),
+        "p_user_id": user_id,
+        "p_template_id": str(template_id),
+    })
+    if not rows:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Template not found")
-    return row
+    return rows[0]
 
 
 @router.post("/organizations/{organization_id}/templates", status_code=status.HTTP_201_CREATED)
 def create_template(
     organization_id: UUID,
     body: CreateTemplateBody,
-    user_id: str = Depends(require_current_user),
+    membership: dict = Depends(require_org_member()),
 ):
     """Create a user template for the org. At least content_html or content_json required."""
-    ensure_org_member(organization_id, user_id)
+    user_id = membership["user_id"]
     if not body.content_html and not body.content_json:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -115,9 +107,10 @@ def create_template(
     if body.subject_line is not None:
         row["subject_line"] = body.subject_line
     r = client.table("templates").insert(row).execute()
-    if not r.data or len(r.data) == 0:
+    if not r.data:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Failed to create template")
+    _template_count_cache.pop(str(organization_id))
     return r.data[0]
 
 
@@ -126,25 +119,14 @@ def update_template(
     organization_id: UUID,
     template_id: UUID,
     body: UpdateTemplateBody,
-    user_id: str = Depends(require_current_user),
+    membership: dict = Depends(require_org_member()),
 ):
     """Update a user-created template. Cannot update admin_provided templates."""
-    ensure_org_member(organization_id, user_id)
     payload = body.model_dump(exclude_unset=True)
-    client = get_supabase_client()
     if not payload:
-        r = (
-            client.table("templates")
-            .select("*")
-            .eq("id", str(template_id))
-            .eq("organization_id", str(organization_id))
-            .limit(1)
-            .execute()
-        )
-        if not r.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, detail="Template not found")
-        return r.data[0]
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="No fields to update")
+    client = get_supabase_client()
     r = (
         client.table("templates")
         .update(payload)
@@ -158,14 +140,16 @@ def update_template(
     return r.data[0]
 
 
-@router.delete("/organizations/{organization_id}/templates/{template_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete(
+    "/organizations/{organization_id}/templates/{template_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+)
 def delete_template(
     organization_id: UUID,
     template_id: UUID,
-    user_id: str = Depends(require_current_user),
+    membership: dict = Depends(require_org_member()),
 ):
     """Delete a user-created template. Admin-provided templates cannot be deleted."""
-    ensure_org_member(organization_id, user_id)
     client = get_supabase_client()
     r = (
         client.table("templates")
@@ -174,4 +158,5 @@ def delete_template(
         .eq("organization_id", str(organization_id))
         .execute()
     )
+    _template_count_cache.pop(str(organization_id))
     return None
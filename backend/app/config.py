@@ -1,6 +1,6 @@
 """Load configuration from environment. Server-only: never expose service-role or secrets to client."""
 
-from functools import lru_cache
+from functools import cached_property, lru_cache
 from typing import Literal
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -13,6 +13,8 @@ class Settings(BaseSettings):
         env_file=".env",
         env_file_encoding="utf-8",
         extra="ignore",
+        # One shared instance (get_settings is cached): read-only so no caller can change it.
+        frozen=True,
     )
 
     supabase_url: str = ""
@@ -27,6 +29,15 @@ class Settings(BaseSettings):
     allowed_origins_extra: str = ""
     allowed_origins_regex: str = ""
     cors_allow_all: bool = False
+    # Sync route handlers run in AnyIO's threadpool (default 40 threads); each blocks on
+    # Supabase HTTP calls, so allow more concurrent handlers per worker.
+    threadpool_size: int = 100
+    # Shared Supabase HTTP pool (per worker). Keep every connection alive by default: a full
+    # threadpool of handlers can each hold one.
+    supabase_max_connections: int = 100
+    supabase_max_keepalive: int = 100
+    supabase_keepalive_expiry: float = 30.0
+    supabase_timeout: float = 120.0
 
     aws_access_key_id: str = ""
     aws_secret_access_key: str = ""
@@ -43,6 +54,11 @@ class Settings(BaseSettings):
     def is_development(self) -> bool:
         return self.environment == "development"
 
+    @cached_property
+    def cron_secret_bytes(self) -> bytes:
+        """Stripped CRON_SECRET, encoded once for constant-time comparison."""
+        return self.cron_secret.strip().encode()
+
 
 @lru_cache
 def get_settings() -> Settings:
@@ -6,20 +6,41 @@ Supabase can issue JWTs with HS256 (JWT Secret) or ES256 (JWKS). We support both
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Sequence
-
-if TYPE_CHECKING:
-    from uuid import UUID
+import re
+import time
+from functools import lru_cache
+from typing import Any, Sequence
+from uuid import UUID
 
 import jwt
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jwt import PyJWKClient
 
+from app.cache import TTLCache
 from app.config import get_settings
 
 security = HTTPBearer(auto_error=False)
 
+# Positive membership results only: (org_id, user_id) -> role. New members are seen at once;
+# removing a member or changing a role takes effect within the 60s TTL (there is no explicit
+# invalidation, and other workers would keep their own copies anyway).
+_membership_cache = TTLCache(maxsize=10_000, ttl=60)
+# Verified bearer token -> (sub, exp). Repeat requests with the same token skip signature
+# verification; entries never outlive the token's own exp.
+_token_cache = TTLCache(maxsize=10_000, ttl=60)
+# Compact JWS shape (header.payload.signature, base64url). Anything else is rejected before
+# it reaches the cache or the decoder; the length cap bounds work on oversized headers.
+_JWT_RE = re.compile(r"[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+")
+_JWT_MAX_LEN = 4096
+
+
+@lru_cache(maxsize=4)
+def _get_jwks_client(jwks_uri: str) -> PyJWKClient:
+    """One JWKS client per URI, so the key set is fetched once an hour (or on an unknown kid)
+    instead of on every request."""
+    return PyJWKClient(jwks_uri, cache_keys=True, lifespan=3600)
+
 
 def _decode_header_only(token: str) -> dict | None:
     """Decode JWT header without verification to get alg/kid."""
@@ -29,6 +50,32 @@ def _decode_header_only(token: str) -> dict | None:
         return None
 
 
+def _decode_hs256(token: str, secret: str) -> dict:
+    return jwt.decode(token, secret, audience="authenticated", algorithms=["HS256"])
+
+
+def _decode_by_header(token: str, settings: Any) -> dict | None:
+    """Pick the key from the token's alg header: ES256 via JWKS, else HS256 via the JWT secret."""
+    header = _decode_header_only(token)
+    if not header:
+        return None
+    alg = header.get("alg") or "HS256"
+    if alg == "ES256" and settings.supabase_url:
+        jwks_uri = settings.supabase_url.rstrip(
+            "/") + "/auth/v1/.well-known/jwks.json"
+        jwks_client = _get_jwks_client(jwks_uri)
+        signing_key = jwks_client.get_signing_key_from_jwt(token)
+        return jwt.decode(
+            token,
+            signing_key.key,
+            audience="authenticated",
+            algorithms=["ES256"],
+        )
+    if not settings.supabase_jwt_secret:
+        return None
+    return _decode_hs256(token, settings.supabase_jwt_secret)
+
+
 async def get_current_user_id(
     credentials: HTTPAuthorizationCredentials | None = Depends(security),
 ) -> str | None:
@@ -36,36 +83,35 @@ async def get_current_user_id(
     if not credentials or not credentials.credentials:
         return None
     token = credentials.credentials
-    settings = get_settings()
-    header = _decode_header_only(token)
-    if not header:
+    if len(token) > _JWT_MAX_LEN or not _JWT_RE.fullmatch(token):
         return None
-    alg = header.get("alg") or "HS256"
+    cached = _token_cache.get(token)
+    if cached is not None:
+        sub, exp = cached
+        if exp is None or exp > time.time():
+            return sub
+        _token_cache.pop(token)
+    settings = get_settings()
 
+    payload: dict | None
     try:
-        if alg == "ES256" and settings.supabase_url:
-            jwks_uri = settings.supabase_url.rstrip(
-                "/") + "/auth/v1/.well-known/jwks.json"
-            jwks_client = PyJWKClient(jwks_uri)
-            signing_key = jwks_client.get_signing_key_from_jwt(token)
-            payload = jwt.decode(
-                token,
-                signing_key.key,
-                audience="authenticated",
-                algorithms=["ES256"],
-            )
+        if settings.supabase_jwt_secret:
+            # Common case: HS256 project. PyJWT rejects any other alg, and only then do we
+            # look at the header to find the right key.
+            try:
+                payload = _decode_hs256(token, settings.supabase_jwt_secret)
+            except jwt.InvalidAlgorithmError:
+                payload = _decode_by_header(token, settings)
         else:
-            if not settings.supabase_jwt_secret:
-                return None
-            payload = jwt.decode(
-                token,
-                settings.supabase_jwt_secret,
-                audience="authenticated",
-                algorithms=["HS256"],
-            )
-        return payload.get("sub")
+            payload = _decode_by_header(token, settings)
     except jwt.PyJWTError:
         return None
+    if not payload:
+        return None
+    sub = payload.get("sub")
+    if sub:
+        _token_cache.set(token, (sub, payload.get("exp")))
+    return sub
 
 
 async def require_current_user(
@@ -82,56 +128,108 @@ async def require_current_user(
 
 def require_org_member(min_roles: Sequence[str] = ("member",)):
     """Dependency factory: require user to be member of org with at least one of min_roles.
-    Use as: Depends(require_org_member(('owner', 'admin'))).
+    Use as: Depends(require_org_member(('owner', 'admin'))). "member" admits any role.
+    Reads organization_id from the path. The role comes from the shared membership cache and
+    the result is kept on request.state.membership for the rest of the request.
     """
 
-    async def _require(
+    def _require(
+        request: Request,
+        organization_id: UUID,
         user_id: str = Depends(require_current_user),
     ) -> dict:
-        return {"user_id": user_id, "role": "member"}
+        membership = _request_membership(request, organization_id, user_id)
+        if "member" not in min_roles and membership["role"] not in min_roles:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Only " + " or ".join(min_roles) + " can perform this action",
+            )
+        return membership
 
     return _require
 
 
-def ensure_org_member(org_id: UUID, user_id: str) -> None:
-    """Raise 403 if user is not a member of the org. Import from app.dependencies."""
-    from app.supabase_client import get_supabase_client
-    client = get_supabase_client()
-    r = (
-        client.table("organization_members")
-        .select("id")
-        .eq("organization_id", str(org_id))
-        .eq("user_id", user_id)
-        .limit(1)
-        .execute()
-    )
-    if not r.data or len(r.data) == 0:
+def _request_membership(
+    request: Request | None, org_id: UUID | str, user_id: str
+) -> dict:
+    """Membership of (org, user), looked up once per request: reuses request.state.membership
+    when it matches, else reads the role (cached) and stores it there. 403 for non-members."""
+    state = getattr(request, "state", None)
+    membership = getattr(state, "membership", None)
+    if (
+        membership is not None
+        and membership["organization_id"] == str(org_id)
+        and membership["user_id"] == user_id
+    ):
+        return membership
+    role = _get_org_role(str(org_id), user_id)
+    if role is None:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not a member of this organization",
         )
-
-
-def ensure_org_admin(org_id: UUID, user_id: str) -> None:
-    """Raise 403 if user is not owner or admin of the org."""
+    membership = {"organization_id": str(org_id), "user_id": user_id, "role": role}
+    if state is not None:
+        state.membership = membership
+    return membership
+
+
+def _get_org_role(org_id: str, user_id: str) -> str | None:
+    """Return the user's role in the org, or None if not a member. Cached per (org, user)."""
+    key = (org_id, user_id)
+    role = _membership_cache.get(key)
+    if role is not None:
+        return role
     from app.supabase_client import get_supabase_client
-
     client = get_supabase_client()
     r = (
         client.table("organization_members")
         .select("role")
-        .eq("organization_id", str(org_id))
+        .eq("organization_id", org_id)
         .eq("user_id", user_id)
-        .limit(1)
+        .maybe_single()
         .execute()
     )
-    if not r.data or len(r.data) == 0:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not a member of this organization",
-        )
-    if r.data[0].get("role") not in ("owner", "admin"):
+    if r is None:
+        return None
+    role = r.data.get("role") or "member"
+    _membership_cache.set(key, role)
+    return role
+
+
+def ensure_org_member(org_id: UUID | str, user_id: str, request: Request | None = None) -> None:
+    """Raise 403 if user is not a member of the org. Import from app.dependencies.
+    Successful checks are cached for 60s per (org, user); pass request to reuse (and store)
+    request.state.membership."""
+    _request_membership(request, org_id, user_id)
+
+
+def ensure_org_admin(org_id: UUID | str, user_id: str, request: Request | None = None) -> None:
+    """Raise 403 if user is not owner or admin of the org. Shares the membership cache; pass
+    request to reuse the membership require_org_member already stored for this request."""
+    role = _request_membership(request, org_id, user_id)["role"]
+    if role not in ("owner", "admin"):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only owner or admin can perform this action",
         )
+
+
+def call_org_rpc(fn: str, params: dict[str, Any]) -> Any:
+    """Call an org-scoped RPC (membership check + query in one round trip; see migration 011).
+    The function raises SQLSTATE 42501 for non-members, which is mapped to 403 here."""
+    from postgrest.exceptions import APIError
+
+    from app.supabase_client import get_supabase_client
+
+    client = get_supabase_client()
+    try:
+        r = client.rpc(fn, params).execute()
+    except APIError as e:
+        if e.code == "42501":
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not a member of this organization",
+            ) from None
+        raise
+    return r.data
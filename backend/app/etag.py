@@ -0,0 +1,29 @@
+"""Conditional GET: weak ETag over the JSON body; 304 when If-None-Match matches."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Any
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+
+def _matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in (t.strip() for t in if_none_match.split(","))
+
+
+def json_with_etag(request: Request, content: Any) -> Response:
+    """Serialize content once, tag it, and return 304 (no body) if the client already has it.
+    Cache-Control makes browsers revalidate every time instead of reusing a stale copy."""
+    body = json.dumps(jsonable_encoder(content), separators=(",", ":")).encode()
+    etag = 'W/"' + hashlib.sha1(body, usedforsecurity=False).hexdigest() + '"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if _matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
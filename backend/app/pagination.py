@@ -0,0 +1,45 @@
+"""Keyset (cursor) pagination on (created_at, id), newest first.
+
+Cursors are opaque to clients: urlsafe base64 of "<created_at>|<id>" taken from the last row
+of a page. Callers fetch limit + 1 rows so the extra row signals another page.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+from datetime import datetime
+from typing import Any
+from uuid import UUID
+
+from fastapi import HTTPException, status
+
+
+def encode_cursor(row: dict[str, Any]) -> str:
+    """Build the cursor pointing after row."""
+    raw = f"{row['created_at']}|{row['id']}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str | None) -> tuple[str | None, str | None]:
+    """Return (created_at, id) for the RPC cursor params; (None, None) for the first page.
+    Raise 400 if the cursor is malformed."""
+    if not cursor:
+        return None, None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, row_id = raw.rsplit("|", 1)
+        datetime.fromisoformat(created_at)
+        UUID(row_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor") from None
+    return created_at, row_id
+
+
+def paginate(rows: list[dict[str, Any]], limit: int) -> tuple[list[dict[str, Any]], str | None]:
+    """Trim rows fetched with limit + 1 to limit; return (page, next_cursor or None)."""
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    return page, encode_cursor(page[-1])
@@ -0,0 +1,45 @@
+"""P1-DASH-002: Buffered activity_events inserts — one PostgREST insert per batch, not per event."""
+
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from fastapi import HTTPException, status
+from postgrest.exceptions import APIError
+
+from app.services.batcher import MicroBatcher
+from app.supabase_client import get_supabase_client
+
+# Wait at most this long for a batch to be written before failing the request.
+SUBMIT_TIMEOUT_SEC = 10.0
+
+
+def _insert_events(rows: list[dict]) -> list[dict]:
+    client = get_supabase_client()
+    r = client.table("activity_events").insert(rows).execute()
+    return r.data or []
+
+
+# A rejected row fails the whole insert, so failed batches are retried row by row.
+activity_batcher = MicroBatcher(
+    _insert_events, max_batch=500, max_wait=0.05, name="activity-buffer", retry_singly=True)
+
+
+def insert_activity_event(row: dict) -> dict | None:
+    """Insert one event via the shared batch; returns the created row (None if not returned).
+    Raises 400 if the database rejects the row, 503 if the write does not finish in time."""
+    future = activity_batcher.submit(row)
+    try:
+        return future.result(timeout=SUBMIT_TIMEOUT_SEC)
+    except FutureTimeoutError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Timed out writing event",
+        ) from None
+    except APIError as e:
+        # Class 22 (data exception) / 23 (integrity constraint): the row itself is invalid.
+        if (e.code or "")[:2] in ("22", "23"):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid event") from None
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to create event",
+        ) from None
@@ -0,0 +1,110 @@
+"""Micro-batching: coalesce many small writes from request threads into one bulk call.
+
+Callers submit an item and get a Future; a daemon thread collects up to max_batch items
+(or whatever arrived within max_wait seconds of the first) and hands them to flush().
+"""
+
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class MicroBatcher:
+    """flush(items) must return one result per item, in order (e.g. inserted rows).
+    retry_singly: when a batch fails, flush its items one at a time so only the callers whose
+    own item fails get the exception (for writes where one bad row rejects the whole insert)."""
+
+    def __init__(
+        self,
+        flush: Callable[[list[Any]], list[Any]],
+        max_batch: int = 500,
+        max_wait: float = 0.05,
+        name: str = "micro-batcher",
+        retry_singly: bool = False,
+    ) -> None:
+        self._flush = flush
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.name = name
+        self.retry_singly = retry_singly
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def submit(self, item: Any) -> Future:
+        """Queue item for the next batch; the Future resolves to flush()'s result for it."""
+        fut: Future = Future()
+        self._ensure_started()
+        self._queue.put((item, fut))
+        return fut
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Flush what is queued and stop the worker thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            batch = [first]
+            stop = False
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    nxt = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if nxt is _STOP:
+                    stop = True
+                    break
+                batch.append(nxt)
+            self._flush_batch(batch)
+            if stop:
+                return
+
+    def _flush_batch(self, batch: list[tuple[Any, Future]]) -> None:
+        error = self._try_flush(batch)
+        if error is None:
+            return
+        if self.retry_singly and len(batch) > 1:
+            for entry in batch:
+                self._flush_batch([entry])
+            return
+        for _, fut in batch:
+            fut.set_exception(error)
+
+    def _try_flush(self, batch: list[tuple[Any, Future]]) -> Exception | None:
+        """Flush batch and resolve its futures; return the exception instead if flush() raised."""
+        try:
+            results = self._flush([item for item, _ in batch])
+        except Exception as e:
+            logger.exception("%s: flush of %s items failed", self.name, len(batch))
+            return e
+        for i, (_, fut) in enumerate(batch):
+            fut.set_result(results[i] if i < len(results) else None)
+        return None
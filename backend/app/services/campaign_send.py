@@ -1,306 +1,294 @@
 """P2-SES-002: Resolve recipients from target_rules, render template, send via SES in batches."""
 
+import hashlib
+import itertools
 import re
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Iterator
+from urllib.parse import quote
 from uuid import UUID
 
 from app.config import get_settings
-from app.ses_client import send_email
+from app.services.rate_limit import TokenBucket
+from app.ses_client import create_template, delete_template, send_bulk_templated_email
 from app.supabase_client import get_supabase_client
-from app.tracking import create_tracking_token, wrap_links_for_tracking
+from app.tracking import create_tracking_token, url_template_var, wrap_links_for_tracking
 
 DEFAULT_RATE_PER_SEC = 1.0
 
 
-def _render_vars(text: str, contact: dict) -> str:
-    """Replace {{first_name}}, {{email}}, etc. with contact fields."""
+# Contact fields usable as {{placeholders}} in subject/body; anything else is dropped.
+_TEMPLATE_VARS = ("first_name", "last_name", "email", "country")
+# Every variable the SES template may reference, including the URL-encoded copies used in
+# tracked links; missing values default to "".
+_DEFAULT_TEMPLATE_DATA = {
+    **dict.fromkeys(_TEMPLATE_VARS, ""),
+    **dict.fromkeys(map(url_template_var, _TEMPLATE_VARS), ""),
+}
+_PLACEHOLDER_RE = re.compile(r"\{\{([^}]+)\}\}")
+# SendBulkTemplatedEmail accepts at most 50 destinations per call.
+SES_BULK_MAX = 50
+# Concurrent SES calls per campaign send.
+SES_MAX_INFLIGHT = 4
+# Pending recipients fetched per request while sending (<= PostgREST max-rows).
+PENDING_PAGE_SIZE = 1000
+_NOT_SENDABLE = "Campaign already sent or not sendable"
+
+
+def _ses_template_text(text: str, raw: bool = False) -> str:
+    """Turn {{first_name}} etc. into SES template variables and drop unknown placeholders.
+    raw: use {{{var}}} (no HTML escaping), for the subject line."""
     if not text:
         return text
-    result = text
-    for key, val in contact.items():
-        if val is None:
-            val = ""
-        result = result.replace("{{" + key + "}}", str(val))
-    result = re.sub(r"\{\{[^}]+\}\}", "", result)
-    return result
 
+    def repl(m: re.Match) -> str:
+        key = m.group(1)
+        if key not in _TEMPLATE_VARS:
+            return ""
+        return "{{{" + key + "}}}" if raw else "{{" + key + "}}"
+    return _PLACEHOLDER_RE.sub(repl, text)
 
-def resolve_recipients(campaign_id: UUID, organization_id: UUID) -> list[dict]:
-    """
-    Resolve contacts that match campaign target_rules.
-    Returns list of contact dicts (id, email, first_name, last_name, country) with email set.
-    """
-    client = get_supabase_client()
-    org_id = str(organization_id)
-    camp_id = str(campaign_id)
 
-    r_camp = (
-        client.table("campaigns")
-        .select("id, template_id, subject_line")
-        .eq("id", camp_id)
-        .eq("organization_id", org_id)
-        .limit(1)
-        .execute()
-    )
-    if not r_camp.data:
-        return []
+@lru_cache(maxsize=64)
+def _build_ses_template(subject: str, body_html: str, tracking_base: str) -> tuple[str, str, str]:
+    """Render a campaign into an SES template once: SES fills in the per-recipient variables
+    (and {{track_token}} when tracking_base is set). Returns (subject, html, content digest).
+    Keyed on content, so an edited template is simply a new entry; retries and re-sends of
+    the same content reuse the result."""
+    html = _ses_template_text(body_html)
+    if tracking_base:
+        click_base = f"{tracking_base}/api/v1/track/click?r={{{{track_token}}}}&url="
+        html = wrap_links_for_tracking(html, click_base)
+        html += (
+            f'<img src="{tracking_base}/api/v1/track/open?r={{{{track_token}}}}"'
+            ' width="1" height="1" alt="" />'
+        )
+    subject_part = _ses_template_text(subject, raw=True)
+    digest = hashlib.sha256((subject_part + html).encode()).hexdigest()[:12]
+    return subject_part, html, digest
 
-    r_rules = (
-        client.table("campaign_target_rules")
-        .select("*")
-        .eq("campaign_id", camp_id)
-        .eq("organization_id", org_id)
-        .limit(1)
-        .execute()
-    )
-    rules = (r_rules.data or [{}])[0] if r_rules.data else {}
-    exclude_unsubscribed = rules.get("exclude_unsubscribed", True)
-    exclude_inactive = rules.get("exclude_inactive", True)
-    exclude_bounced = rules.get("exclude_bounced", False)
-    exclude_countries = rules.get("exclude_countries") or []
-    include_tags = rules.get("include_tags") or []
-    exclude_tags = rules.get("exclude_tags") or []
-
-    q = (
-        client.table("contacts")
-        .select("id, email, first_name, last_name, country")
-        .eq("organization_id", org_id)
-        .not_.is_("email", "null")
-        .is_("deleted_at", "null")
-    )
-    if exclude_inactive:
-        q = q.eq("is_active", True)
-    if exclude_unsubscribed:
-        q = q.eq("is_subscribed", True)
-    r_contacts = q.execute()
-    contacts = list(r_contacts.data or [])
-    if not contacts:
-        return []
 
-    # Filter by country
-    if exclude_countries:
-        exclude_set = {c.strip().lower() for c in exclude_countries if c}
-        contacts = [c for c in contacts if not (
-            c.get("country") or "").strip().lower() in exclude_set]
-
-    if include_tags:
-        tag_names = [t.strip() for t in include_tags if t]
-        if tag_names:
-            r_tags = (
-                client.table("contact_tags")
-                .select("id")
-                .eq("organization_id", org_id)
-                .in_("name", tag_names)
-                .execute()
-            )
-            tag_ids = [t["id"] for t in (r_tags.data or [])]
-            if tag_ids:
-                r_assign = (
-                    client.table("contact_tag_assignments")
-                    .select("contact_id")
-                    .in_("tag_id", tag_ids)
-                    .execute()
-                )
-                allowed_ids = {a["contact_id"] for a in (r_assign.data or [])}
-                contacts = [c for c in contacts if c["id"] in allowed_ids]
-            else:
-                contacts = []
-
-    # Exclude tags: remove contacts that have any tag in exclude_tags
-    if exclude_tags and contacts:
-        tag_names = [t.strip() for t in exclude_tags if t]
-        if tag_names:
-            r_tags = (
-                client.table("contact_tags")
-                .select("id")
-                .eq("organization_id", org_id)
-                .in_("name", tag_names)
-                .execute()
-            )
-            tag_ids = [t["id"] for t in (r_tags.data or [])]
-            if tag_ids:
-                r_assign = (
-                    client.table("contact_tag_assignments")
-                    .select("contact_id")
-                    .in_("tag_id", tag_ids)
-                    .execute()
-                )
-                excluded_ids = {a["contact_id"] for a in (r_assign.data or [])}
-                contacts = [c for c in contacts if c["id"] not in excluded_ids]
+def prepare_campaign_recipients(campaign_id: UUID, organization_id: UUID) -> int:
+    """Insert resolved contacts into campaign_recipients (status=pending).
+    Returns count of recipients.
+    Audience resolution and the insert run in Postgres (migration 033); contacts are never
+    loaded into the API."""
+    client = get_supabase_client()
+    r = client.rpc("prepare_campaign_recipients", {
+        "p_organization_id": str(organization_id),
+        "p_campaign_id": str(campaign_id),
+    }).execute()
+    return r.data or 0
+
 
-    # Exclude bounced (contact_ids that have bounced in this org)
-    if exclude_bounced and contacts:
-        r_bounced = (
+def _iter_pending(client, camp_id: str, org_id: str) -> Iterator[list[dict]]:
+    """Yield the campaign's pending recipients (with their contact embedded) a page at a time,
+    keyset-paginated on id so memory stays at one page and PostgREST's max-rows cap never
+    truncates the send."""
+    last_id = None
+    while True:
+        q = (
             client.table("campaign_recipients")
-            .select("contact_id")
+            .select("id, contact_id, contacts(email, first_name, last_name, country)")
+            .eq("campaign_id", camp_id)
             .eq("organization_id", org_id)
-            .eq("status", "bounced")
-            .execute()
+            .eq("status", "pending")
         )
-        bounced_ids = {b["contact_id"] for b in (r_bounced.data or [])}
-        contacts = [c for c in contacts if c["id"] not in bounced_ids]
+        if last_id is not None:
+            q = q.gt("id", last_id)
+        page = q.order("id").limit(PENDING_PAGE_SIZE).execute().data or []
+        if not page:
+            return
+        yield page
+        if len(page) < PENDING_PAGE_SIZE:
+            return
+        last_id = page[-1]["id"]
 
-    out = []
-    for c in contacts:
-        out.append({
-            "id": c["id"],
-            "email": (c.get("email") or "").strip(),
-            "first_name": (c.get("first_name") or "").strip(),
-            "last_name": (c.get("last_name") or "").strip(),
-            "country": (c.get("country") or "").strip(),
-        })
-    return [x for x in out if x["email"]]
 
-
-def prepare_campaign_recipients(campaign_id: UUID, organization_id: UUID) -> int:
-    """Insert resolved contacts into campaign_recipients (status=pending). Returns count of recipients."""
-    client = get_supabase_client()
-    org_id = str(organization_id)
-    camp_id = str(campaign_id)
-    contacts = resolve_recipients(campaign_id, organization_id)
-    for c in contacts:
-        row = {
-            "campaign_id": camp_id,
-            "contact_id": c["id"],
-            "organization_id": org_id,
-            "status": "pending",
+def _send_chunk(
+    chunk: list[dict],
+    template_name: str,
+    tracking: bool,
+    bucket: TokenBucket,
+    now_iso: str,
+) -> tuple[int, int, list[dict]]:
+    """Send one chunk (at most SES_BULK_MAX recipients) in one SES call and mark the
+    delivered ones sent. Returns (sent, failed, errors)."""
+    failed = 0
+    errors: list[dict] = []
+    recs = []
+    destinations = []
+    for rec in chunk:
+        cid = rec["contact_id"]
+        contact = rec.get("contacts") or {}
+        email = (contact.get("email") or "").strip()
+        if not email:
+            failed += 1
+            errors.append({"contact_id": cid, "reason": "Contact or email missing"})
+            continue
+        data = {
+            "first_name": contact.get("first_name") or "",
+            "last_name": contact.get("last_name") or "",
+            "email": email,
+            "country": contact.get("country") or "",
         }
-        try:
-            client.table("campaign_recipients").insert(row).execute()
-        except Exception:
-            pass  # duplicate (campaign_id, contact_id) — skip
-    return len(contacts)
+        if tracking:
+            data["track_token"] = create_tracking_token(str(rec["id"]))
+            # Personalised links go through the click redirect as url=<encoded link>.
+            for key in _TEMPLATE_VARS:
+                data[url_template_var(key)] = quote(data[key], safe="")
+        recs.append(rec)
+        destinations.append((email, data))
+    if not destinations:
+        return 0, failed, errors
+    # SES's send rate counts recipients, not API calls.
+    bucket.acquire(len(destinations))
+    try:
+        statuses = send_bulk_templated_email(
+            template_name, destinations, default_data=_DEFAULT_TEMPLATE_DATA)
+    except Exception as e:
+        bucket.refund(len(destinations))
+        errors.extend({"contact_id": str(rec["contact_id"]), "reason": str(e)[:200]}
+                      for rec in recs)
+        return 0, failed + len(recs), errors
+    sent_ids = []
+    for rec, st in zip(recs, statuses):
+        if st.get("Status") == "Success":
+            sent_ids.append(rec["id"])
+        else:
+            failed += 1
+            errors.append({
+                "contact_id": str(rec["contact_id"]),
+                "reason": (st.get("Error") or st.get("Status") or "")[:200],
+            })
+    bucket.refund(len(recs) - len(sent_ids))
+    if sent_ids:
+        get_supabase_client().table("campaign_recipients").update(
+            {"status": "sent", "sent_at": now_iso}
+        ).in_("id", sent_ids).execute()
+    return len(sent_ids), failed, errors
 
 
 def send_campaign_batch(
     campaign_id: UUID,
     organization_id: UUID,
     rate_per_sec: float = DEFAULT_RATE_PER_SEC,
+    bucket: TokenBucket | None = None,
 ) -> dict:
     """
     Prepare recipients if needed, then send to all pending via SES.
+    Pass `bucket` to share one send-rate budget between concurrent campaigns
+    (rate_per_sec is then ignored).
     Returns { "sent": n, "failed": n, "errors": [...] }.
     """
     client = get_supabase_client()
     org_id = str(organization_id)
     camp_id = str(campaign_id)
 
-    r_camp = (
-        client.table("campaigns")
-        .select("id, template_id, subject_line, status")
-        .eq("id", camp_id)
-        .eq("organization_id", org_id)
-        .limit(1)
-        .execute()
-    )
+    # Campaign + template in one request, concurrently with the first page of pending
+    # recipients (independent reads: one round trip of wall time instead of two).
+    pages = _iter_pending(client, camp_id, org_id)
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="send-prefetch") as pool:
+        first_page_future = pool.submit(next, pages, None)
+        r_camp = (
+            client.table("campaigns")
+            .select("id, template_id, subject_line, status, templates(content_html, subject_line)")
+            .eq("id", camp_id)
+            .eq("organization_id", org_id)
+            .limit(1)
+            .execute()
+        )
+        first_page = first_page_future.result()
     if not r_camp.data:
         return {"sent": 0, "failed": 0, "errors": [{"reason": "Campaign not found"}]}
     campaign = r_camp.data[0]
     if campaign["status"] not in ("draft", "scheduled"):
-        return {"sent": 0, "failed": 0, "errors": [{"reason": "Campaign already sent or not sendable"}]}
+        return {"sent": 0, "failed": 0, "errors": [{"reason": _NOT_SENDABLE}]}
 
     template_id = campaign.get("template_id")
     if not template_id:
         return {"sent": 0, "failed": 0, "errors": [{"reason": "Campaign has no template"}]}
 
-    r_tpl = (
-        client.table("templates")
-        .select("content_html, subject_line")
-        .eq("id", str(template_id))
-        .limit(1)
-        .execute()
-    )
-    if not r_tpl.data:
+    template = campaign.get("templates")
+    if not template:
         return {"sent": 0, "failed": 0, "errors": [{"reason": "Template not found"}]}
-    template = r_tpl.data[0]
     body_html = template.get("content_html") or "<p>No content</p>"
     subject = (campaign.get("subject_line") or template.get(
         "subject_line") or "Campaign").strip()
 
-    r_pending = (
-        client.table("campaign_recipients")
-        .select("id, contact_id")
-        .eq("campaign_id", camp_id)
-        .eq("organization_id", org_id)
-        .eq("status", "pending")
-        .execute()
-    )
-    pending = r_pending.data or []
-    if not pending:
+    if first_page is None:
         prepare_campaign_recipients(campaign_id, organization_id)
-        r_pending = (
-            client.table("campaign_recipients")
-            .select("id, contact_id")
-            .eq("campaign_id", camp_id)
-            .eq("organization_id", org_id)
-            .eq("status", "pending")
-            .execute()
-        )
-        pending = r_pending.data or []
-    if not pending:
+        pages = _iter_pending(client, camp_id, org_id)
+        first_page = next(pages, None)
+    if first_page is None:
         return {"sent": 0, "failed": 0, "errors": [], "message": "No recipients to send"}
+    pages = itertools.chain([first_page], pages)
 
-    client.table("campaigns").update({"status": "sending"}).eq(
-        "id", camp_id).eq("organization_id", org_id).execute()
-
-    contact_ids = [p["contact_id"] for p in pending]
-    r_contacts = (
-        client.table("contacts")
-        .select("id, email, first_name, last_name, country")
-        .in_("id", contact_ids)
+    # Compare-and-set: only one caller (cron run, manual send) can move the campaign from
+    # draft/scheduled to sending; the others stop here instead of sending twice.
+    r_claim = (
+        client.table("campaigns")
+        .update({"status": "sending"})
+        .eq("id", camp_id)
+        .eq("organization_id", org_id)
+        .in_("status", ["draft", "scheduled"])
         .execute()
     )
-    contacts_by_id = {c["id"]: c for c in (r_contacts.data or [])}
+    if not r_claim.data:
+        return {"sent": 0, "failed": 0, "errors": [{"reason": _NOT_SENDABLE}]}
+
     now_iso = datetime.now(timezone.utc).isoformat()
     sent = 0
     failed = 0
     errors: list[dict] = []
-    delay = 1.0 / rate_per_sec if rate_per_sec > 0 else 0
 
-    for rec in pending:
-        cid = rec["contact_id"]
-        contact = contacts_by_id.get(cid)
-        if not contact or not (contact.get("email") or "").strip():
-            failed += 1
-            errors.append(
-                {"contact_id": cid, "reason": "Contact or email missing"})
-            continue
-        email = (contact["email"] or "").strip()
-        ctx = {
-            "first_name": contact.get("first_name") or "",
-            "last_name": contact.get("last_name") or "",
-            "email": email,
-            "country": contact.get("country") or "",
-        }
-        body_final = _render_vars(body_html, ctx)
-        settings = get_settings()
-        if (settings.tracking_base_url or "").strip() and (settings.tracking_secret or "").strip():
+    settings = get_settings()
+    base = (settings.tracking_base_url or "").strip().rstrip("/")
+    tracking = bool(base and (settings.tracking_secret or "").strip())
+    template_subject, template_html, digest = _build_ses_template(
+        subject, body_html, base if tracking else "")
+    template_name = f"nanis-{camp_id}-{digest}"
+    try:
+        create_template(template_name, template_subject, template_html)
+    except Exception as e:
+        errors.append({"reason": f"SES template: {str(e)[:200]}"})
+        failed = sum(len(page) for page in pages)
+        pages = iter(())
+        template_name = ""
+
+    # Chunks go out in parallel so SES latency does not eat into the send rate; the token
+    # bucket (one token per recipient) keeps the combined rate at rate_per_sec. Pages are sent
+    # one after another, so at most one page of recipients is held in memory.
+    if bucket is None:
+        bucket = TokenBucket(rate_per_sec)
+    # One SES call must not carry more recipients than the send rate allows per second:
+    # cap chunks at the bucket's burst size.
+    chunk_size = SES_BULK_MAX
+    if bucket.rate > 0:
+        chunk_size = max(1, min(SES_BULK_MAX, int(bucket.capacity)))
+    try:
+        with ThreadPoolExecutor(
+            max_workers=SES_MAX_INFLIGHT, thread_name_prefix="ses-send"
+        ) as pool:
+            for page in pages:
+                chunks = [page[i:i + chunk_size] for i in range(0, len(page), chunk_size)]
+                results = pool.map(
+                    lambda chunk: _send_chunk(chunk, template_name, tracking, bucket, now_iso),
+                    chunks,
+                )
+                for c_sent, c_failed, c_errors in results:
+                    sent += c_sent
+                    failed += c_failed
+                    errors.extend(c_errors)
+    finally:
+        if template_name:
             try:
-                token = create_tracking_token(str(rec["id"]))
-                base = (settings.tracking_base_url or "").strip().rstrip("/")
-                open_url = f"{base}/api/v1/track/open?r={token}"
-                click_base = f"{base}/api/v1/track/click?r={token}&url="
-                body_final = wrap_links_for_tracking(body_final, click_base)
-                body_final = body_final + \
-                    f'<img src="{open_url}" width="1" height="1" alt="" />'
+                delete_template(template_name)
             except Exception:
                 pass
-        try:
-            send_email(
-                to_address=email,
-                subject=_render_vars(subject, ctx),
-                body_html=body_final,
-            )
-            client.table("campaign_recipients").update(
-                {"status": "sent", "sent_at": now_iso}
-            ).eq("id", rec["id"]).execute()
-            sent += 1
-        except Exception as e:
-            failed += 1
-            errors.append({"contact_id": str(cid), "reason": str(e)[:200]})
-        if delay > 0:
-            time.sleep(delay)
 
     new_status = "failed" if failed > 0 and sent == 0 else "sent"
     client.table("campaigns").update({
@@ -311,12 +299,32 @@ def send_campaign_batch(
     return {"sent": sent, "failed": failed, "errors": errors[:100]}
 
 
+def _process_scheduled_campaign(camp: dict, bucket: TokenBucket) -> dict:
+    """Send one scheduled campaign, retrying once after 2s on failure."""
+    camp_id = camp["id"]
+    org_id = camp["organization_id"]
+    out = {"campaign_id": camp_id, "organization_id": org_id}
+    try:
+        result = send_campaign_batch(UUID(camp_id), UUID(org_id), bucket=bucket)
+    except Exception:
+        time.sleep(2)
+        try:
+            result = send_campaign_batch(UUID(camp_id), UUID(org_id), bucket=bucket)
+        except Exception as e2:
+            return {**out, "status": "failed", "error": str(e2)[:500]}
+    return {**out, "status": "sent", "result": result}
+
+
 def process_scheduled_campaigns(
     max_campaigns: int = 5,
     rate_per_sec: float = DEFAULT_RATE_PER_SEC,
+    concurrency: int = 1,
 ) -> list[dict]:
     """
-    Find campaigns with status='scheduled' and scheduled_at <= now(), send each (with one retry on failure).
+    Find campaigns with status='scheduled' and scheduled_at <= now(), send each
+    (with one retry on failure).
+    Up to `concurrency` campaigns send in parallel from one shared token bucket, so the combined
+    SES send rate stays within rate_per_sec and budget a campaign leaves unused goes to the others.
     Returns list of { campaign_id, organization_id, status, result?, error? }.
     """
     client = get_supabase_client()
@@ -331,37 +339,11 @@ def process_scheduled_campaigns(
         .execute()
     )
     campaigns = r.data or []
-    results: list[dict] = []
-    for camp in campaigns:
-        camp_id = camp["id"]
-        org_id = camp["organization_id"]
-        try:
-            result = send_campaign_batch(
-                UUID(camp_id), UUID(org_id), rate_per_sec=rate_per_sec
-            )
-            results.append({
-                "campaign_id": camp_id,
-                "organization_id": org_id,
-                "status": "sent",
-                "result": result,
-            })
-        except Exception:
-            try:
-                time.sleep(2)
-                result = send_campaign_batch(
-                    UUID(camp_id), UUID(org_id), rate_per_sec=rate_per_sec
-                )
-                results.append({
-                    "campaign_id": camp_id,
-                    "organization_id": org_id,
-                    "status": "sent",
-                    "result": result,
-                })
-            except Exception as e2:
-                results.append({
-                    "campaign_id": camp_id,
-                    "organization_id": org_id,
-                    "status": "failed",
-                    "error": str(e2)[:500],
-                })
-    return results
+    if not campaigns:
+        return []
+    workers = max(1, min(concurrency, len(campaigns)))
+    bucket = TokenBucket(rate_per_sec)
+    if workers == 1:
+        return [_process_scheduled_campaign(c, bucket) for c in campaigns]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="campaign-send") as pool:
+        return list(pool.map(lambda c: _process_scheduled_campaign(c, bucket), campaigns))
@@ -0,0 +1,38 @@
+"""Thread-safe token bucket for outbound rate limits (e.g. SES max send rate)."""
+
+from __future__ import annotations
+
+import threading
+import time
+
+
+class TokenBucket:
+    """rate tokens per second, bursting up to capacity. acquire(n) may run the balance
+    negative: the caller sleeps off its own deficit, and later callers queue behind it."""
+
+    def __init__(self, rate: float, capacity: float | None = None) -> None:
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, n: float = 1) -> None:
+        """Block until n tokens are available. No-op when rate <= 0 (unlimited)."""
+        if self.rate <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= n
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+
+    def refund(self, n: float) -> None:
+        """Return n tokens that were acquired but not used (e.g. a send that failed)."""
+        if self.rate <= 0 or n <= 0:
+            return
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + n)
@@ -0,0 +1,39 @@
+"""P2-SES-004: Buffered open/click tracking — one RPC per batch, not three requests per hit."""
+
+import time
+from datetime import datetime, timezone
+
+from app.cache import TTLCache
+from app.services.batcher import MicroBatcher
+from app.supabase_client import get_supabase_client
+
+# (event_type, recipient_id) already recorded by this process. Only the first open/click per
+# recipient is recorded, so repeat pixel loads (clients re-rendering the mail) stop here.
+_seen = TTLCache(maxsize=100_000, ttl=600)
+
+
+def _record_events(items: list[dict]) -> list[None]:
+    # record_tracking_events (migration 029) dedupes per recipient and only logs first events.
+    for item in items:
+        item["at"] = datetime.fromtimestamp(item["at"], timezone.utc).isoformat()
+    client = get_supabase_client()
+    client.rpc("record_tracking_events", {"p_events": items}).execute()
+    # Marked only once written: if the RPC fails, the next hit for the recipient is recorded.
+    for item in items:
+        _seen.set((item["event_type"], item["recipient_id"]), True)
+    return [None] * len(items)
+
+tracking_batcher = MicroBatcher(
+    _record_events, max_batch=200, max_wait=0.5, name="tracking-buffer")
+
+
+def record_tracking_event(event_type: str, recipient_id: str, link_url: str | None = None) -> None:
+    """Queue an open/click for the next batch; returns immediately (failures are logged)."""
+    if _seen.get((event_type, recipient_id)):
+        return
+    tracking_batcher.submit({
+        "event_type": event_type,
+        "recipient_id": recipient_id,
+        "link_url": link_url,
+        "at": time.time(),  # formatted on the flush thread, not per request
+    })
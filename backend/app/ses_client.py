@@ -1,12 +1,16 @@
 """Amazon SES client — server-only. P2-SES-002: send email via SES."""
 
+import json
+from functools import lru_cache
 from typing import Any
 
 from app.config import get_settings
 
 
+@lru_cache(maxsize=1)
 def get_ses_client() -> Any:
-    """Return boto3 SES client. Requires AWS_* and SES_FROM_EMAIL in env."""
+    """Return the shared boto3 SES client (thread-safe; built once per worker, like the
+    Supabase client). Requires AWS_* and SES_FROM_EMAIL in env."""
     settings = get_settings()
     if not settings.aws_access_key_id or not settings.aws_secret_access_key:
         raise RuntimeError(
@@ -16,11 +20,20 @@ def get_ses_client() -> Any:
         raise RuntimeError(
             "SES_FROM_EMAIL must be set (verified sender in SES)")
     import boto3
+    from botocore.config import Config
+
     return boto3.client(
         "ses",
         region_name=settings.aws_region,
         aws_access_key_id=settings.aws_access_key_id,
         aws_secret_access_key=settings.aws_secret_access_key,
+        config=Config(
+            # Up to 10 scheduled campaigns x SES_MAX_INFLIGHT concurrent calls each.
+            max_pool_connections=40,
+            # Adaptive mode also backs off client-side when SES throttles.
+            retries={"mode": "adaptive", "max_attempts": 5},
+            tcp_keepalive=True,
+        ),
     )
 
 
@@ -46,3 +59,50 @@ def send_email(
         Destination={"ToAddresses": [to_address]},
         Message={"Subject": msg["Subject"], "Body": msg["Body"]},
     )
+
+
+def create_template(name: str, subject: str, body_html: str) -> None:
+    """Register an SES template ({{var}} placeholders). Keeps an existing template of that name."""
+    client = get_ses_client()
+    try:
+        client.create_template(Template={
+            "TemplateName": name,
+            "SubjectPart": subject,
+            "HtmlPart": body_html,
+        })
+    except client.exceptions.AlreadyExistsException:
+        pass
+
+
+def delete_template(name: str) -> None:
+    """Delete an SES template; a missing one is ignored."""
+    client = get_ses_client()
+    try:
+        client.delete_template(TemplateName=name)
+    except client.exceptions.TemplateDoesNotExistException:
+        pass
+
+
+def send_bulk_templated_email(
+    template_name: str,
+    destinations: list[tuple[str, dict[str, str]]],
+    default_data: dict[str, str] | None = None,
+    from_email: str | None = None,
+) -> list[dict[str, Any]]:
+    """Send one templated email per (to_address, template_data), up to 50 per call.
+    Returns SES's per-destination status ({Status, MessageId?, Error?}), in input order."""
+    client = get_ses_client()
+    settings = get_settings()
+    r = client.send_bulk_templated_email(
+        Source=from_email or settings.ses_from_email,
+        Template=template_name,
+        DefaultTemplateData=json.dumps(default_data or {}),
+        Destinations=[
+            {
+                "Destination": {"ToAddresses": [to_address]},
+                "ReplacementTemplateData": json.dumps(data),
+            }
+            for to_address, data in destinations
+        ],
+    )
+    return r.get("Status") or []
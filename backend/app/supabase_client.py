@@ -3,10 +3,30 @@
 from functools import lru_cache
 from typing import Any
 
+import httpx
+
 from app.config import get_settings
 
 
-@lru_cache
+@lru_cache(maxsize=1)
+def _get_http_client() -> httpx.Client:
+    """One pooled HTTP client per worker, shared by PostgREST/storage calls. Keeps TLS
+    connections (HTTP/2 where the server supports it, so concurrent calls multiplex over one
+    connection) warm across requests. Pool size and timeouts come from
+    SUPABASE_MAX_CONNECTIONS etc. (see config)."""
+    settings = get_settings()
+    limits = httpx.Limits(
+        max_connections=settings.supabase_max_connections,
+        max_keepalive_connections=settings.supabase_max_keepalive,
+        keepalive_expiry=settings.supabase_keepalive_expiry,
+    )
+    # retries=1 re-attempts only failed connects (e.g. a pooled connection the server dropped),
+    # never a request that was sent, so it is safe for writes too.
+    transport = httpx.HTTPTransport(http2=True, limits=limits, retries=1)
+    return httpx.Client(transport=transport, timeout=httpx.Timeout(settings.supabase_timeout))
+
+
+@lru_cache(maxsize=1)
 def get_supabase_client() -> Any:
     """Return Supabase client with service_role key. Use only in backend."""
     settings = get_settings()
@@ -14,4 +34,18 @@ def get_supabase_client() -> Any:
         raise RuntimeError(
             "SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY must be set")
     from supabase import create_client
-    return create_client(settings.supabase_url, settings.supabase_service_role_key)
+    from supabase.lib.client_options import SyncClientOptions
+
+    return create_client(
+        settings.supabase_url,
+        settings.supabase_service_role_key,
+        options=SyncClientOptions(httpx_client=_get_http_client()),
+    )
+
+
+def close_supabase_client() -> None:
+    """Close pooled connections on shutdown. No-op if the client was never built."""
+    if _get_http_client.cache_info().currsize:
+        _get_http_client().close()
+        _get_http_client.cache_clear()
+        get_supabase_client.cache_clear()
@@ -3,32 +3,70 @@
 import base64
 import hmac
 import hashlib
+import re
+from functools import lru_cache
 from urllib.parse import quote
+from uuid import UUID
 
 from app.config import get_settings
 
+_HREF_RE = re.compile(r'href="([^"]+)"')
+# {{var}} / {{{var}}} SES template variable inside a link.
+_TEMPLATE_VAR_RE = re.compile(r"\{\{\{?(\w+)\}?\}\}")
+
+
+@lru_cache(maxsize=4)
+def _keyed_hmac(secret: bytes) -> hmac.HMAC:
+    """HMAC-SHA256 with the key schedule already applied; copy() it per message."""
+    return hmac.new(secret, digestmod=hashlib.sha256)
+
+
+def _sign(secret: bytes, msg: bytes) -> bytes:
+    h = _keyed_hmac(secret).copy()
+    h.update(msg)
+    return h.digest()
+
+
+def _tag(secret: bytes, uid: bytes) -> bytes:
+    return _sign(secret, uid)[:16]
+
 
 def create_tracking_token(campaign_recipient_id: str) -> str:
-    """Return a signed token for use in track URLs. Fails if TRACKING_SECRET not set."""
+    """Return a signed token for use in track URLs. Fails if TRACKING_SECRET not set.
+    Format: base64url(16-byte recipient UUID + 16-byte truncated HMAC-SHA256), 43 chars."""
     settings = get_settings()
     secret = (settings.tracking_secret or "").encode("utf-8")
     if not secret:
         raise RuntimeError("TRACKING_SECRET must be set for tracking")
-    payload = campaign_recipient_id.encode("utf-8")
-    sig = hmac.new(secret, payload, hashlib.sha256).digest()
-    b64_payload = base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
-    b64_sig = base64.urlsafe_b64encode(sig).decode("ascii").rstrip("=")
-    return f"{b64_payload}.{b64_sig}"
+    uid = UUID(campaign_recipient_id).bytes
+    return base64.urlsafe_b64encode(uid + _tag(secret, uid)).decode("ascii").rstrip("=")
 
 
 def verify_tracking_token(token: str) -> str | None:
-    """Verify token and return campaign_recipient_id, or None if invalid."""
-    if not token or "." not in token:
+    """Verify token and return campaign_recipient_id, or None if invalid.
+    Also accepts the older payload.signature tokens found in mail sent before the compact format."""
+    if not token:
         return None
     settings = get_settings()
     secret = (settings.tracking_secret or "").encode("utf-8")
     if not secret:
         return None
+    if "." in token:
+        return _verify_legacy_token(token, secret)
+    if len(token) != 43:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=")
+    except Exception:
+        return None
+    uid, tag = raw[:16], raw[16:]
+    if len(tag) != 16 or not hmac.compare_digest(tag, _tag(secret, uid)):
+        return None
+    return str(UUID(bytes=uid))
+
+
+def _verify_legacy_token(token: str, secret: bytes) -> str | None:
+    """base64url(recipient id string).base64url(full HMAC-SHA256)."""
     parts = token.split(".", 1)
     if len(parts) != 2:
         return None
@@ -37,7 +75,7 @@ def verify_tracking_token(token: str) -> str | None:
         payload = base64.urlsafe_b64decode(b64_payload)
         campaign_recipient_id = payload.decode("utf-8")
         sig_got = base64.urlsafe_b64decode(parts[1] + "==")
-        sig_expected = hmac.new(secret, payload, hashlib.sha256).digest()
+        sig_expected = _sign(secret, payload)
         if hmac.compare_digest(sig_got, sig_expected):
             return campaign_recipient_id
     except Exception:
@@ -45,14 +83,33 @@ def verify_tracking_token(token: str) -> str | None:
     return None
 
 
+def url_template_var(name: str) -> str:
+    """Name of the template variable that holds the URL-encoded value of variable name."""
+    return f"{name}_url"
+
+
+def _encode_link(url: str) -> str:
+    """URL-encode url for the url= parameter. {{var}} parts cannot be encoded here (the value
+    is per recipient), so they become {{{var_url}}}: the sender supplies that value already
+    encoded (see url_template_var), and the triple stash keeps SES from HTML-escaping it."""
+    # split() with one group alternates [text, var, text, var, ..., text].
+    pieces = _TEMPLATE_VAR_RE.split(url)
+    for j in range(len(pieces)):
+        if j % 2:
+            pieces[j] = "{{{" + url_template_var(pieces[j]) + "}}}"
+        else:
+            pieces[j] = quote(pieces[j], safe="")
+    return "".join(pieces)
+
+
 def wrap_links_for_tracking(html: str, click_redirect_base: str) -> str:
-    """Replace href="..." with click redirect URL. click_redirect_base must end with &url= or ?url=."""
-    import re
-
-    def repl(m: re.Match) -> str:
-        url = m.group(1)
-        if url.startswith("mailto:") or url.startswith("#"):
-            return m.group(0)
-        encoded = quote(url, safe="")
-        return f'href="{click_redirect_base}{encoded}"'
-    return re.sub(r'href="([^"]+)"', repl, html)
+    """Replace href="..." with click redirect URL. click_redirect_base must end with &url= or ?url=.
+    Links with template variables are wrapped too (see _encode_link)."""
+    parts = _HREF_RE.split(html)
+    for i in range(1, len(parts), 2):
+        url = parts[i]
+        if url.startswith(("mailto:", "#")):
+            parts[i] = f'href="{url}"'
+        else:
+            parts[i] = f'href="{click_redirect_base}{_encode_link(url)}"'
+    return "".join(parts)
@@ -0,0 +1,20 @@
+"""Shared Pydantic field types for request bodies."""
+
+from functools import lru_cache
+from typing import Annotated
+
+from pydantic import AfterValidator, WithJsonSchema, validate_email
+
+
+@lru_cache(maxsize=4096)
+def _normalize_email(value: str) -> str:
+    """Same checks and normalization as EmailStr (no DNS lookups); repeats hit the cache."""
+    return validate_email(value)[1]
+
+
+# Drop-in replacement for EmailStr: identical validation, memoized per distinct address.
+EmailAddress = Annotated[
+    str,
+    AfterValidator(_normalize_email),
+    WithJsonSchema({"type": "string", "format": "email"}),
+]
@@ -0,0 +1,180 @@
+-- Org-scoped read RPCs: membership check + primary query in one round trip.
+-- Run after 010_email_events.sql. Called by the backend (service role) with the current
+-- user's id; non-members get SQLSTATE 42501 (insufficient_privilege), mapped to 403 by the API.
+
+-- -----------------------------------------------------------------------------
+-- 1. Membership guard
+-- -----------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION public.assert_org_member(p_organization_id UUID, p_user_id UUID)
+RETURNS void
+LANGUAGE plpgsql
+STABLE
+SET search_path = public
+AS $$
+BEGIN
+  IF NOT EXISTS (
+    SELECT 1 FROM public.organization_members om
+    WHERE om.organization_id = p_organization_id AND om.user_id = p_user_id
+  ) THEN
+    RAISE EXCEPTION 'Not a member of this organization' USING ERRCODE = '42501';
+  END IF;
+END;
+$$;
+
+-- -----------------------------------------------------------------------------
+-- 2. Activity feed
+-- -----------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION public.org_list_activity(
+  p_organization_id UUID,
+  p_user_id UUID,
+  p_limit INT
+)
+RETURNS SETOF public.activity_events
+LANGUAGE plpgsql
+STABLE
+SET search_path = public
+AS $$
+BEGIN
+  PERFORM public.assert_org_member(p_organization_id, p_user_id);
+  RETURN QUERY
+    SELECT e.*
+    FROM public.activity_events e
+    WHERE e.organization_id = p_organization_id
+    ORDER BY e.created_at DESC
+    LIMIT p_limit;
+END;
+$$;
+
+-- -----------------------------------------------------------------------------
+-- 3. Campaigns
+-- -----------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION public.org_list_campaigns(
+  p_organization_id UUID,
+  p_user_id UUID,
+  p_status TEXT,
+  p_limit INT,
+  p_offset INT
+)
+RETURNS jsonb
+LANGUAGE plpgsql
+STABLE
+SET search_path = public
+AS $$
+DECLARE
+  v_total BIGINT;
+  v_rows JSONB;
+BEGIN
+  PERFORM public.assert_org_member(p_organization_id, p_user_id);
+  SELECT count(*) INTO v_total
+  FROM public.campaigns c
+  WHERE c.organization_id = p_organization_id
+    AND (p_status IS NULL OR c.status = p_status);
+  SELECT coalesce(jsonb_agg(to_jsonb(t) ORDER BY t.created_at DESC), '[]'::jsonb) INTO v_rows
+  FROM (
+    SELECT c.id, c.organization_id, c.name, c.status, c.template_id, c.subject_line,
+           c.scheduled_at, c.sent_at, c.created_at, c.updated_at
+    FROM public.campaigns c
+    WHERE c.organization_id = p_organization_id
+      AND (p_status IS NULL OR c.status = p_status)
+    ORDER BY c.created_at DESC
+    LIMIT p_limit OFFSET p_offset
+  ) t;
+  RETURN jsonb_build_object('campaigns', v_rows, 'total', v_total);
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION public.org_get_campaign(
+  p_organization_id UUID,
+  p_user_id UUID,
+  p_campaign_id UUID
+)
+RETURNS SETOF public.campaigns
+LANGUAGE plpgsql
+STABLE
+SET search_path = public
+AS $$
+BEGIN
+  PERFORM public.assert_org_member(p_organization_id, p_user_id);
+  RETURN QUERY
+    SELECT c.*
+    FROM public.campaigns c
+    WHERE c.id = p_campaign_id AND c.organization_id = p_organization_id
+    LIMIT 1;
+END;
+$$;
+
+-- -----------------------------------------------------------------------------
+-- 4. Campaign recipients + analytics
+-- -----------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION public.org_list_campaign_recipients(
+  p_organization_id UUID,
+  p_user_id UUID,
+  p_campaign_id UUID,
+  p_status TEXT,
+  p_limit INT,
+  p_offset INT
+)
+RETURNS jsonb
+LANGUAGE plpgsql
+STABLE
+SET search_path = public
+AS $$
+DECLARE
+  v_total BIGINT;
+  v_rows JSONB;
+BEGIN
+  PERFORM public.assert_org_member(p_organization_id, p_user_id);
+  SELECT count(*) INTO v_total
+  FROM public.campaign_recipients r
+  WHERE r.campaign_id = p_campaign_id
+    AND r.organization_id = p_organization_id
+    AND (p_status IS NULL OR r.status = p_status);
+  SELECT coalesce(jsonb_agg(to_jsonb(t) ORDER BY t.created_at DESC), '[]'::jsonb) INTO v_rows
+  FROM (
+    SELECT r.id, r.campaign_id, r.contact_id, r.status, r.sent_at, r.bounced_at,
+           r.opened_at, r.clicked_at, r.created_at
+    FROM public.campaign_recipients r
+    WHERE r.campaign_id = p_campaign_id
+      AND r.organization_id = p_organization_id
+      AND (p_status IS NULL OR r.status = p_status)
+    ORDER BY r.created_at DESC
+    LIMIT p_limit OFFSET p_offset
+  ) t;
+  RETURN jsonb_build_object('recipients', v_rows, 'total', v_total);
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION public.org_campaign_analytics_rows(
+  p_organization_id UUID,
+  p_user_id UUID,
+  p_campaign_id UUID
+)
+RETURNS TABLE (id UUID, sent_at TIMESTAMPTZ, opened_at TIMESTAMPTZ, clicked_at TIMESTAMPTZ)
+LANGUAGE plpgsql
+STABLE
+SET search_path = public
+AS $$
+BEGIN
+  PERFORM public.assert_org_member(p_organization_id, p_user_id);
+  RETURN QUERY
+    SELECT r.id, r.sent_at, r.opened_at, r.clicked_at
+    FROM public.campaign_recipients r
+    WHERE r.campaign_id = p_campaign_id AND r.organization_id = p_organization_id;
+END;
+$$;
+
+-- -----------------------------------------------------------------------------
+-- 5. Backend only: the caller passes p_user_id, so never expose these to clients
+-- -----------------------------------------------------------------------------
+REVOKE EXECUTE ON FUNCTION public.assert_org_member(UUID, UUID) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.org_list_activity(UUID, UUID, INT) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.org_list_campaigns(UUID, UUID, TEXT, INT, INT) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.org_get_campaign(UUID, UUID, UUID) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.org_list_campaign_recipients(UUID, UUID, UUID, TEXT, INT, INT) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.org_campaign_analytics_rows(UUID, UUID, UUID) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.assert_org_member(UUID, UUID) TO service_role;
+GRANT EXECUTE ON FUNCTION public.org_list_activity(UUID, UUID, INT) TO service_role;
+GRANT EXECUTE ON FUNCTION public.org_list_campaigns(UUID, UUID, TEXT, INT, INT) TO service_role;
+GRANT EXECUTE ON FUNCTION public.org_get_campaign(UUID, UUID, UUID) TO service_role;
+GRANT EXECUTE ON FUNCTION public.org_list_campaign_recipients(UUID, UUID, UUID, TEXT, INT, INT) TO service_role;
+GRANT EXECUTE ON FUNCTION public.org_campaign_analytics_rows(UUID, UUID, UUID) TO service_role;
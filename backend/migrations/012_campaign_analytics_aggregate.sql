@@ -0,0 +1,35 @@
+-- Campaign analytics: aggregate counts in Postgres instead of shipping recipient rows.
+-- Run after 011_org_scoped_rpcs.sql. Replaces org_campaign_analytics_rows.
+
+-- -----------------------------------------------------------------------------
+-- 1. Aggregate RPC (membership check + counts in one round trip)
+-- -----------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION public.org_campaign_analytics(
+  p_organization_id UUID,
+  p_user_id UUID,
+  p_campaign_id UUID
+)
+RETURNS TABLE (sent_count BIGINT, open_count BIGINT, click_count BIGINT)
+LANGUAGE plpgsql
+STABLE
+SET search_path = public
+AS $$
+BEGIN
+  PERFORM public.assert_org_member(p_organization_id, p_user_id);
+  RETURN QUERY
+    SELECT
+      count(*) FILTER (WHERE r.sent_at IS NOT NULL),
+      count(*) FILTER (WHERE r.opened_at IS NOT NULL),
+      count(*) FILTER (WHERE r.clicked_at IS NOT NULL)
+    FROM public.campaign_recipients r
+    WHERE r.campaign_id = p_campaign_id AND r.organization_id = p_organization_id;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.org_campaign_analytics(UUID, UUID, UUID) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.org_campaign_analytics(UUID, UUID, UUID) TO service_role;
+
+-- -----------------------------------------------------------------------------
+-- 2. Drop the row-returning variant from 011
+-- -----------------------------------------------------------------------------
+DROP FUNCTION IF EXISTS public.org_campaign_analytics_rows(UUID, UUID, UUID);
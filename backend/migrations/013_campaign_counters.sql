@@ -0,0 +1,93 @@
+-- Campaign analytics counters: maintained by trigger on campaign_recipients, read in O(1).
+-- Run after 012_campaign_analytics_aggregate.sql.
+
+-- -----------------------------------------------------------------------------
+-- 1. Counter columns
+-- -----------------------------------------------------------------------------
+ALTER TABLE public.campaigns
+  ADD COLUMN IF NOT EXISTS sent_count INT NOT NULL DEFAULT 0,
+  ADD COLUMN IF NOT EXISTS open_count INT NOT NULL DEFAULT 0,
+  ADD COLUMN IF NOT EXISTS click_count INT NOT NULL DEFAULT 0;
+
+-- -----------------------------------------------------------------------------
+-- 2. Trigger: apply the delta of sent_at/opened_at/clicked_at becoming (non-)null
+-- -----------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION public.campaign_recipients_update_counters()
+RETURNS trigger
+LANGUAGE plpgsql
+SET search_path = public
+AS $$
+DECLARE
+  v_campaign_id UUID;
+  v_sent INT := 0;
+  v_open INT := 0;
+  v_click INT := 0;
+BEGIN
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    v_campaign_id := NEW.campaign_id;
+    v_sent := v_sent + (NEW.sent_at IS NOT NULL)::int;
+    v_open := v_open + (NEW.opened_at IS NOT NULL)::int;
+    v_click := v_click + (NEW.clicked_at IS NOT NULL)::int;
+  END IF;
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    v_campaign_id := OLD.campaign_id;
+    v_sent := v_sent - (OLD.sent_at IS NOT NULL)::int;
+    v_open := v_open - (OLD.opened_at IS NOT NULL)::int;
+    v_click := v_click - (OLD.clicked_at IS NOT NULL)::int;
+  END IF;
+  IF v_sent <> 0 OR v_open <> 0 OR v_click <> 0 THEN
+    UPDATE public.campaigns
+    SET sent_count = sent_count + v_sent,
+        open_count = open_count + v_open,
+        click_count = click_count + v_click
+    WHERE id = v_campaign_id;
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS campaign_recipients_counters ON public.campaign_recipients;
+CREATE TRIGGER campaign_recipients_counters
+  AFTER INSERT OR DELETE OR UPDATE OF sent_at, opened_at, clicked_at
+  ON public.campaign_recipients
+  FOR EACH ROW EXECUTE FUNCTION public.campaign_recipients_update_counters();
+
+-- -----------------------------------------------------------------------------
+-- 3. Backfill existing campaigns (re-run this block to rebuild counters)
+-- -----------------------------------------------------------------------------
+UPDATE public.campaigns c
+SET sent_count = coalesce(a.sent_count, 0),
+    open_count = coalesce(a.open_count, 0),
+    click_count = coalesce(a.click_count, 0)
+FROM (
+  SELECT c2.id,
+         count(r.id) FILTER (WHERE r.sent_at IS NOT NULL) AS sent_count,
+         count(r.id) FILTER (WHERE r.opened_at IS NOT NULL) AS open_count,
+         count(r.id) FILTER (WHERE r.clicked_at IS NOT NULL) AS click_count
+  FROM public.campaigns c2
+  LEFT JOIN public.campaign_recipients r ON r.campaign_id = c2.id
+  GROUP BY c2.id
+) a
+WHERE a.id = c.id;
+
+-- -----------------------------------------------------------------------------
+-- 4. Analytics RPC reads the counters instead of scanning recipients
+-- -----------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION public.org_campaign_analytics(
+  p_organization_id UUID,
+  p_user_id UUID,
+  p_campaign_id UUID
+)
+RETURNS TABLE (sent_count BIGINT, open_count BIGINT, click_count BIGINT)
+LANGUAGE plpgsql
+STABLE
+SET search_path = public
+AS $$
+BEGIN
+  PERFORM public.assert_org_member(p_organization_id, p_user_id);
+  RETURN QUERY
+    SELECT c.sent_count::bigint, c.open_count::bigint, c.click_count::bigint
+    FROM public.campaigns c
+    WHERE c.id = p_campaign_id AND c.organization_id = p_organization_id;
+END;
+$$;
@@ -0,0 +1,39 @@
+-- Campaign recipients list: drop the per-page COUNT(*); return has_more instead.
+-- Run after 013_campaign_counters.sql. Fetches limit + 1 rows to detect a next page.
+
+CREATE OR REPLACE FUNCTION public.org_list_campaign_recipients(
+  p_organization_id UUID,
+  p_user_id UUID,
+  p_campaign_id UUID,
+  p_status TEXT,
+  p_limit INT,
+  p_offset INT
+)
+RETURNS jsonb
+LANGUAGE plpgsql
+STABLE
+SET search_path = public
+AS $$
+DECLARE
+  v_rows JSONB;
+  v_len INT;
+BEGIN
+  PERFORM public.assert_org_member(p_organization_id, p_user_id);
+  SELECT coalesce(jsonb_agg(to_jsonb(t) ORDER BY t.created_at DESC), '[]'::jsonb) INTO v_rows
+  FROM (
+    SELECT r.id, r.campaign_id, r.contact_id, r.status, r.sent_at, r.bounced_at,
+           r.opened_at, r.clicked_at, r.created_at
+    FROM public.campaign_recipients r
+    WHERE r.campaign_id = p_campaign_id
+      AND r.organization_id = p_organization_id
+      AND (p_status IS NULL OR r.status = p_status)
+    ORDER BY r.created_at DESC
+    LIMIT p_limit + 1 OFFSET p_offset
+  ) t;
+  v_len := jsonb_array_length(v_rows);
+  IF v_len > p_limit THEN
+    v_rows := v_rows - (v_len - 1);
+  END IF;
+  RETURN jsonb_build_object('recipients', v_rows, 'has_more', v_len > p_limit);
+END;
+$$;
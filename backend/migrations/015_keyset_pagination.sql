@@ -0,0 +1,125 @@
+-- Keyset pagination for activity, campaigns and campaign recipients on (created_at, id).
+-- Run after 014_recipients_has_more.sql. Replaces the OFFSET-based RPCs from 011/014.
+-- Cursor params are NULL for the first page; rows strictly after (created_at, id) DESC otherwise.
+
+-- -----------------------------------------------------------------------------
+-- 1. Indexes matching ORDER BY created_at DESC, id DESC
+-- -----------------------------------------------------------------------------
+CREATE INDEX IF NOT EXISTS idx_activity_events_org_created_id
+  ON public.activity_events(organization_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_campaigns_org_created_id
+  ON public.campaigns(organization_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_campaign_recipients_campaign_created_id
+  ON public.campaign_recipients(campaign_id, created_at DESC, id DESC);
+
+-- -----------------------------------------------------------------------------
+-- 2. Replace OFFSET-based functions
+-- -----------------------------------------------------------------------------
+DROP FUNCTION IF EXISTS public.org_list_activity(UUID, UUID, INT);
+DROP FUNCTION IF EXISTS public.org_list_campaigns(UUID, UUID, TEXT, INT, INT);
+DROP FUNCTION IF EXISTS public.org_list_campaign_recipients(UUID, UUID, UUID, TEXT, INT, INT);
+
+CREATE OR REPLACE FUNCTION public.org_list_activity(
+  p_organization_id UUID,
+  p_user_id UUID,
+  p_limit INT,
+  p_cursor_created_at TIMESTAMPTZ,
+  p_cursor_id UUID
+)
+RETURNS SETOF public.activity_events
+LANGUAGE plpgsql
+STABLE
+SET search_path = public
+AS $$
+BEGIN
+  PERFORM public.assert_org_member(p_organization_id, p_user_id);
+  RETURN QUERY
+    SELECT e.*
+    FROM public.activity_events e
+    WHERE e.organization_id = p_organization_id
+      AND (p_cursor_created_at IS NULL OR (e.created_at, e.id) < (p_cursor_created_at, p_cursor_id))
+    ORDER BY e.created_at DESC, e.id DESC
+    LIMIT p_limit;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION public.org_list_campaigns(
+  p_organization_id UUID,
+  p_user_id UUID,
+  p_status TEXT,
+  p_limit INT,
+  p_cursor_created_at TIMESTAMPTZ,
+  p_cursor_id UUID
+)
+RETURNS jsonb
+LANGUAGE plpgsql
+STABLE
+SET search_path = public
+AS $$
+DECLARE
+  v_total BIGINT;
+  v_rows JSONB;
+BEGIN
+  PERFORM public.assert_org_member(p_organization_id, p_user_id);
+  SELECT count(*) INTO v_total
+  FROM public.campaigns c
+  WHERE c.organization_id = p_organization_id
+    AND (p_status IS NULL OR c.status = p_status);
+  SELECT coalesce(jsonb_agg(to_jsonb(t) ORDER BY t.created_at DESC, t.id DESC), '[]'::jsonb) INTO v_rows
+  FROM (
+    SELECT c.id, c.organization_id, c.name, c.status, c.template_id, c.subject_line,
+           c.scheduled_at, c.sent_at, c.created_at, c.updated_at
+    FROM public.campaigns c
+    WHERE c.organization_id = p_organization_id
+      AND (p_status IS NULL OR c.status = p_status)
+      AND (p_cursor_created_at IS NULL OR (c.created_at, c.id) < (p_cursor_created_at, p_cursor_id))
+    ORDER BY c.created_at DESC, c.id DESC
+    LIMIT p_limit
+  ) t;
+  RETURN jsonb_build_object('campaigns', v_rows, 'total', v_total);
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION public.org_list_campaign_recipients(
+  p_organization_id UUID,
+  p_user_id UUID,
+  p_campaign_id UUID,
+  p_status TEXT,
+  p_limit INT,
+  p_cursor_created_at TIMESTAMPTZ,
+  p_cursor_id UUID
+)
+RETURNS jsonb
+LANGUAGE plpgsql
+STABLE
+SET search_path = public
+AS $$
+DECLARE
+  v_rows JSONB;
+BEGIN
+  PERFORM public.assert_org_member(p_organization_id, p_user_id);
+  SELECT coalesce(jsonb_agg(to_jsonb(t) ORDER BY t.created_at DESC, t.id DESC), '[]'::jsonb) INTO v_rows
+  FROM (
+    SELECT r.id, r.campaign_id, r.contact_id, r.status, r.sent_at, r.bounced_at,
+           r.opened_at, r.clicked_at, r.created_at
+    FROM public.campaign_recipients r
+    WHERE r.campaign_id = p_campaign_id
+      AND r.organization_id = p_organization_id
+      AND (p_status IS NULL OR r.status = p_status)
+      AND (p_cursor_created_at IS NULL OR (r.created_at, r.id) < (p_cursor_created_at, p_cursor_id))
+    ORDER BY r.created_at DESC, r.id DESC
+    LIMIT p_limit
+  ) t;
+  RETURN v_rows;
+END;
+$$;
+
+-- -----------------------------------------------------------------------------
+-- 3. Backend only
+-- -----------------------------------------------------------------------------
+REVOKE EXECUTE ON FUNCTION public.org_list_activity(UUID, UUID, INT, TIMESTAMPTZ, UUID) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.org_list_campaigns(UUID, UUID, TEXT, INT, TIMESTAMPTZ, UUID) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.org_list_campaign_recipients(UUID, UUID, UUID, TEXT, INT, TIMESTAMPTZ, UUID) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.org_list_activity(UUID, UUID, INT, TIMESTAMPTZ, UUID) TO service_role;
+GRANT EXECUTE ON FUNCTION public.org_list_campaigns(UUID, UUID, TEXT, INT, TIMESTAMPTZ, UUID) TO service_role;
+GRANT EXECUTE ON FUNCTION public.org_list_campaign_recipients(UUID, UUID, UUID, TEXT, INT, TIMESTAMPTZ, UUID) TO service_role;
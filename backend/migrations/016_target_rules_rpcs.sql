@@ -0,0 +1,78 @@
+-- Campaign target rules: get-or-create and upsert in one round trip each.
+-- Run after 015_keyset_pagination.sql. Uses UNIQUE(campaign_id) from 008; the row is only
+-- written when the campaign belongs to p_organization_id, so another org's rules are never touched.
+
+-- -----------------------------------------------------------------------------
+-- 1. Get (creates default row if missing)
+-- -----------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION public.org_get_campaign_target_rules(
+  p_organization_id UUID,
+  p_user_id UUID,
+  p_campaign_id UUID
+)
+RETURNS SETOF public.campaign_target_rules
+LANGUAGE plpgsql
+SET search_path = public
+AS $$
+BEGIN
+  PERFORM public.assert_org_member(p_organization_id, p_user_id);
+  INSERT INTO public.campaign_target_rules (campaign_id, organization_id)
+  SELECT c.id, c.organization_id
+  FROM public.campaigns c
+  WHERE c.id = p_campaign_id AND c.organization_id = p_organization_id
+  ON CONFLICT (campaign_id) DO NOTHING;
+  RETURN QUERY
+    SELECT t.*
+    FROM public.campaign_target_rules t
+    WHERE t.campaign_id = p_campaign_id AND t.organization_id = p_organization_id;
+END;
+$$;
+
+-- -----------------------------------------------------------------------------
+-- 2. Upsert
+-- -----------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION public.org_upsert_campaign_target_rules(
+  p_organization_id UUID,
+  p_user_id UUID,
+  p_campaign_id UUID,
+  p_include_tags TEXT[],
+  p_exclude_tags TEXT[],
+  p_exclude_countries TEXT[],
+  p_exclude_unsubscribed BOOLEAN,
+  p_exclude_inactive BOOLEAN,
+  p_exclude_bounced BOOLEAN
+)
+RETURNS SETOF public.campaign_target_rules
+LANGUAGE plpgsql
+SET search_path = public
+AS $$
+BEGIN
+  PERFORM public.assert_org_member(p_organization_id, p_user_id);
+  RETURN QUERY
+    INSERT INTO public.campaign_target_rules AS t (
+      campaign_id, organization_id, include_tags, exclude_tags, exclude_countries,
+      exclude_unsubscribed, exclude_inactive, exclude_bounced
+    )
+    SELECT c.id, c.organization_id, p_include_tags, p_exclude_tags, p_exclude_countries,
+           p_exclude_unsubscribed, p_exclude_inactive, p_exclude_bounced
+    FROM public.campaigns c
+    WHERE c.id = p_campaign_id AND c.organization_id = p_organization_id
+    ON CONFLICT (campaign_id) DO UPDATE SET
+      include_tags = EXCLUDED.include_tags,
+      exclude_tags = EXCLUDED.exclude_tags,
+      exclude_countries = EXCLUDED.exclude_countries,
+      exclude_unsubscribed = EXCLUDED.exclude_unsubscribed,
+      exclude_inactive = EXCLUDED.exclude_inactive,
+      exclude_bounced = EXCLUDED.exclude_bounced
+    WHERE t.organization_id = EXCLUDED.organization_id
+    RETURNING t.*;
+END;
+$$;
+
+-- -----------------------------------------------------------------------------
+-- 3. Backend only
+-- -----------------------------------------------------------------------------
+REVOKE EXECUTE ON FUNCTION public.org_get_campaign_target_rules(UUID, UUID, UUID) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.org_upsert_campaign_target_rules(UUID, UUID, UUID, TEXT[], TEXT[], TEXT[], BOOLEAN, BOOLEAN, BOOLEAN) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.org_get_campaign_target_rules(UUID, UUID, UUID) TO service_role;
+GRANT EXECUTE ON FUNCTION public.org_upsert_campaign_target_rules(UUID, UUID, UUID, TEXT[], TEXT[], TEXT[], BOOLEAN, BOOLEAN, BOOLEAN) TO service_role;
@@ -0,0 +1,74 @@
+-- Campaign create/update as org-scoped RPCs: membership check + write in one round trip,
+-- with plans cached server-side. Run after 016_target_rules_rpcs.sql.
+
+-- -----------------------------------------------------------------------------
+-- 1. Create (draft)
+-- -----------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION public.org_create_campaign(
+  p_organization_id UUID,
+  p_user_id UUID,
+  p_name TEXT,
+  p_template_id UUID,
+  p_subject_line TEXT,
+  p_scheduled_at TIMESTAMPTZ
+)
+RETURNS SETOF public.campaigns
+LANGUAGE plpgsql
+SET search_path = public
+AS $$
+BEGIN
+  PERFORM public.assert_org_member(p_organization_id, p_user_id);
+  RETURN QUERY
+    INSERT INTO public.campaigns (
+      organization_id, name, status, template_id, subject_line, scheduled_at, created_by
+    )
+    VALUES (
+      p_organization_id, p_name, 'draft', p_template_id, p_subject_line, p_scheduled_at, p_user_id
+    )
+    RETURNING *;
+END;
+$$;
+
+-- -----------------------------------------------------------------------------
+-- 2. Update: only keys present in p_patch are changed; an empty patch returns the row as-is
+-- -----------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION public.org_update_campaign(
+  p_organization_id UUID,
+  p_user_id UUID,
+  p_campaign_id UUID,
+  p_patch JSONB
+)
+RETURNS SETOF public.campaigns
+LANGUAGE plpgsql
+SET search_path = public
+AS $$
+BEGIN
+  PERFORM public.assert_org_member(p_organization_id, p_user_id);
+  IF p_patch IS NULL OR p_patch = '{}'::jsonb THEN
+    RETURN QUERY
+      SELECT c.* FROM public.campaigns c
+      WHERE c.id = p_campaign_id AND c.organization_id = p_organization_id;
+    RETURN;
+  END IF;
+  RETURN QUERY
+    UPDATE public.campaigns c SET
+      name = CASE WHEN p_patch ? 'name' THEN p_patch->>'name' ELSE c.name END,
+      template_id = CASE WHEN p_patch ? 'template_id'
+        THEN (p_patch->>'template_id')::uuid ELSE c.template_id END,
+      subject_line = CASE WHEN p_patch ? 'subject_line'
+        THEN p_patch->>'subject_line' ELSE c.subject_line END,
+      scheduled_at = CASE WHEN p_patch ? 'scheduled_at'
+        THEN (p_patch->>'scheduled_at')::timestamptz ELSE c.scheduled_at END,
+      status = CASE WHEN p_patch ? 'status' THEN p_patch->>'status' ELSE c.status END
+    WHERE c.id = p_campaign_id AND c.organization_id = p_organization_id
+    RETURNING c.*;
+END;
+$$;
+
+-- -----------------------------------------------------------------------------
+-- 3. Backend only
+-- -----------------------------------------------------------------------------
+REVOKE EXECUTE ON FUNCTION public.org_create_campaign(UUID, UUID, TEXT, UUID, TEXT, TIMESTAMPTZ) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.org_update_campaign(UUID, UUID, UUID, JSONB) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.org_create_campaign(UUID, UUID, TEXT, UUID, TEXT, TIMESTAMPTZ) TO service_role;
+GRANT EXECUTE ON FUNCTION public.org_update_campaign(UUID, UUID, UUID, JSONB) TO service_role;
@@ -0,0 +1,80 @@
+-- Campaign detail/update RPCs return the same explicit columns as the list instead of c.*.
+-- Run after 017_campaign_write_rpcs.sql. Return type changes, so the functions are recreated.
+
+DROP FUNCTION IF EXISTS public.org_get_campaign(UUID, UUID, UUID);
+DROP FUNCTION IF EXISTS public.org_update_campaign(UUID, UUID, UUID, JSONB);
+
+-- -----------------------------------------------------------------------------
+-- 1. Get
+-- -----------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION public.org_get_campaign(
+  p_organization_id UUID,
+  p_user_id UUID,
+  p_campaign_id UUID
+)
+RETURNS TABLE (
+  id UUID, organization_id UUID, name TEXT, status TEXT, template_id UUID, subject_line TEXT,
+  scheduled_at TIMESTAMPTZ, sent_at TIMESTAMPTZ, created_at TIMESTAMPTZ, updated_at TIMESTAMPTZ
+)
+LANGUAGE plpgsql
+STABLE
+SET search_path = public
+AS $$
+BEGIN
+  PERFORM public.assert_org_member(p_organization_id, p_user_id);
+  RETURN QUERY
+    SELECT c.id, c.organization_id, c.name, c.status, c.template_id, c.subject_line,
+           c.scheduled_at, c.sent_at, c.created_at, c.updated_at
+    FROM public.campaigns c
+    WHERE c.id = p_campaign_id AND c.organization_id = p_organization_id
+    LIMIT 1;
+END;
+$$;
+
+-- -----------------------------------------------------------------------------
+-- 2. Update (same semantics as 017)
+-- -----------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION public.org_update_campaign(
+  p_organization_id UUID,
+  p_user_id UUID,
+  p_campaign_id UUID,
+  p_patch JSONB
+)
+RETURNS TABLE (
+  id UUID, organization_id UUID, name TEXT, status TEXT, template_id UUID, subject_line TEXT,
+  scheduled_at TIMESTAMPTZ, sent_at TIMESTAMPTZ, created_at TIMESTAMPTZ, updated_at TIMESTAMPTZ
+)
+LANGUAGE plpgsql
+SET search_path = public
+AS $$
+#variable_conflict use_column
+BEGIN
+  IF p_patch IS NULL OR p_patch = '{}'::jsonb THEN
+    RETURN QUERY
+      SELECT * FROM public.org_get_campaign(p_organization_id, p_user_id, p_campaign_id);
+    RETURN;
+  END IF;
+  PERFORM public.assert_org_member(p_organization_id, p_user_id);
+  RETURN QUERY
+    UPDATE public.campaigns c SET
+      name = CASE WHEN p_patch ? 'name' THEN p_patch->>'name' ELSE c.name END,
+      template_id = CASE WHEN p_patch ? 'template_id'
+        THEN (p_patch->>'template_id')::uuid ELSE c.template_id END,
+      subject_line = CASE WHEN p_patch ? 'subject_line'
+        THEN p_patch->>'subject_line' ELSE c.subject_line END,
+      scheduled_at = CASE WHEN p_patch ? 'scheduled_at'
+        THEN (p_patch->>'scheduled_at')::timestamptz ELSE c.scheduled_at END,
+      status = CASE WHEN p_patch ? 'status' THEN p_patch->>'status' ELSE c.status END
+    WHERE c.id = p_campaign_id AND c.organization_id = p_organization_id
+    RETURNING c.id, c.organization_id, c.name, c.status, c.template_id, c.subject_line,
+              c.scheduled_at, c.sent_at, c.created_at, c.updated_at;
+END;
+$$;
+
+-- -----------------------------------------------------------------------------
+-- 3. Backend only
+-- -----------------------------------------------------------------------------
+REVOKE EXECUTE ON FUNCTION public.org_get_campaign(UUID, UUID, UUID) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.org_update_campaign(UUID, UUID, UUID, JSONB) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.org_get_campaign(UUID, UUID, UUID) TO service_role;
+GRANT EXECUTE ON FUNCTION public.org_update_campaign(UUID, UUID, UUID, JSONB) TO service_role;
@@ -0,0 +1,33 @@
+-- P2-CRM-004: Bulk contact insert for CSV import that skips duplicate emails natively.
+-- Run after 018_campaign_detail_projection.sql. The (organization_id, lower(email)) unique index
+-- from 006 is partial, so PostgREST on_conflict cannot target it; ON CONFLICT DO NOTHING can.
+-- Returns the email of every inserted row (NULL for mobile-only rows) so the API can
+-- attribute skipped rows back to CSV line numbers.
+
+CREATE OR REPLACE FUNCTION public.import_contacts(p_rows JSONB)
+RETURNS TABLE (email TEXT)
+LANGUAGE sql
+SET search_path = public
+AS $$
+  INSERT INTO public.contacts AS c (
+    organization_id, email, first_name, last_name, mobile, country,
+    source, is_active, is_subscribed, created_by
+  )
+  SELECT
+    (r->>'organization_id')::uuid,
+    r->>'email',
+    r->>'first_name',
+    r->>'last_name',
+    r->>'mobile',
+    r->>'country',
+    coalesce(r->>'source', 'csv_import'),
+    coalesce((r->>'is_active')::boolean, true),
+    coalesce((r->>'is_subscribed')::boolean, true),
+    (r->>'created_by')::uuid
+  FROM jsonb_array_elements(p_rows) AS r
+  ON CONFLICT DO NOTHING
+  RETURNING c.email;
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.import_contacts(JSONB) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.import_contacts(JSONB) TO service_role;
@@ -0,0 +1,16 @@
+-- P2-CRM-001: Trigram indexes so contact search (ILIKE '%term%' on email / first / last name)
+-- can use an index instead of scanning every contact in the org.
+-- Run after 019_import_contacts_rpc.sql. pg_trgm only helps terms of 3+ characters; shorter
+-- terms run the same ILIKE without the index, scanning the org's contacts.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS idx_contacts_email_trgm
+  ON public.contacts USING gin (email gin_trgm_ops)
+  WHERE deleted_at IS NULL;
+CREATE INDEX IF NOT EXISTS idx_contacts_first_name_trgm
+  ON public.contacts USING gin (first_name gin_trgm_ops)
+  WHERE deleted_at IS NULL;
+CREATE INDEX IF NOT EXISTS idx_contacts_last_name_trgm
+  ON public.contacts USING gin (last_name gin_trgm_ops)
+  WHERE deleted_at IS NULL;
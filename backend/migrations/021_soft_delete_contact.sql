@@ -0,0 +1,20 @@
+-- P2-CRM-001: Soft-delete a contact with a database-side timestamp.
+-- Run after 020_contacts_search_trgm.sql. deleted_at comes from the server clock (now()),
+-- not the API node's. Returns the id of the deleted contact; no row means not found
+-- (wrong org or already deleted).
+
+CREATE OR REPLACE FUNCTION public.soft_delete_contact(p_contact_id UUID, p_organization_id UUID)
+RETURNS TABLE (id UUID)
+LANGUAGE sql
+SET search_path = public
+AS $$
+  UPDATE public.contacts AS c
+  SET deleted_at = now()
+  WHERE c.id = p_contact_id
+    AND c.organization_id = p_organization_id
+    AND c.deleted_at IS NULL
+  RETURNING c.id;
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.soft_delete_contact(UUID, UUID) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.soft_delete_contact(UUID, UUID) TO service_role;
@@ -0,0 +1,40 @@
+-- P1-AUTH-003: Onboarding in one round trip and one transaction.
+-- Run after 021_soft_delete_contact.sql. onboard_workspace returns the user's existing org if
+-- they already belong to one; otherwise it creates the org and the owner membership together,
+-- so a failure can no longer leave an org without its owner. A taken slug raises
+-- unique_violation (23505) from the insert, which the API maps to 409.
+
+CREATE OR REPLACE FUNCTION public.onboard_workspace(p_user_id UUID, p_name TEXT, p_slug TEXT)
+RETURNS jsonb
+LANGUAGE plpgsql
+SET search_path = public
+AS $$
+DECLARE
+  v_org public.organizations;
+BEGIN
+  -- Serialize concurrent submits from the same user (double click) so only one org is created.
+  PERFORM pg_advisory_xact_lock(hashtext('onboard_workspace:' || p_user_id::text));
+
+  SELECT o.* INTO v_org
+  FROM public.organization_members om
+  JOIN public.organizations o ON o.id = om.organization_id
+  WHERE om.user_id = p_user_id
+  ORDER BY om.created_at
+  LIMIT 1;
+  IF FOUND THEN
+    RETURN jsonb_build_object('organization', to_jsonb(v_org), 'already_exists', true);
+  END IF;
+
+  INSERT INTO public.organizations (name, slug)
+  VALUES (p_name, p_slug)
+  RETURNING * INTO v_org;
+
+  INSERT INTO public.organization_members (organization_id, user_id, role)
+  VALUES (v_org.id, p_user_id, 'owner');
+
+  RETURN jsonb_build_object('organization', to_jsonb(v_org), 'already_exists', false);
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.onboard_workspace(UUID, TEXT, TEXT) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.onboard_workspace(UUID, TEXT, TEXT) TO service_role;
@@ -0,0 +1,7 @@
+-- P2-CRM-001: Keyset pagination for the contacts list on (created_at, id), newest first.
+-- Run after 022_onboard_workspace.sql. Partial on live rows, matching the list's
+-- deleted_at IS NULL filter.
+
+CREATE INDEX IF NOT EXISTS idx_contacts_org_created_id
+  ON public.contacts(organization_id, created_at DESC, id DESC)
+  WHERE deleted_at IS NULL;
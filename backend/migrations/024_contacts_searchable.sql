@@ -0,0 +1,18 @@
+-- P2-CRM-001: One trigram-indexed search column for contacts instead of three.
+-- Run after 023_contacts_keyset_index.sql. The contacts list searches
+-- searchable ILIKE '%term%' (one index probe) rather than OR-ing three ILIKEs.
+-- Adding a STORED generated column rewrites the table; run it off-peak on large installs.
+
+ALTER TABLE public.contacts
+  ADD COLUMN IF NOT EXISTS searchable TEXT GENERATED ALWAYS AS (
+    coalesce(email, '') || ' ' || coalesce(first_name, '') || ' ' || coalesce(last_name, '')
+  ) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_contacts_searchable_trgm
+  ON public.contacts USING gin (searchable gin_trgm_ops)
+  WHERE deleted_at IS NULL;
+
+-- Superseded by idx_contacts_searchable_trgm.
+DROP INDEX IF EXISTS public.idx_contacts_email_trgm;
+DROP INDEX IF EXISTS public.idx_contacts_first_name_trgm;
+DROP INDEX IF EXISTS public.idx_contacts_last_name_trgm;
@@ -0,0 +1,29 @@
+-- P2-CRM-001: Assign several tags to a contact in one call.
+-- Run after 024_contacts_searchable.sql. Only tags and a contact that belong to
+-- p_organization_id are used (the backend's service role bypasses RLS, so this is the org
+-- check). Tags already assigned are skipped. Returns the newly created assignment rows.
+
+CREATE OR REPLACE FUNCTION public.assign_contact_tags(
+  p_organization_id UUID,
+  p_contact_id UUID,
+  p_tag_ids UUID[],
+  p_user_id UUID
+)
+RETURNS SETOF public.contact_tag_assignments
+LANGUAGE sql
+SET search_path = public
+AS $$
+  INSERT INTO public.contact_tag_assignments (contact_id, tag_id, organization_id, assigned_by)
+  SELECT c.id, t.id, p_organization_id, p_user_id
+  FROM public.contacts c
+  JOIN public.contact_tags t
+    ON t.organization_id = p_organization_id AND t.id = ANY (p_tag_ids)
+  WHERE c.id = p_contact_id
+    AND c.organization_id = p_organization_id
+    AND c.deleted_at IS NULL
+  ON CONFLICT (contact_id, tag_id) DO NOTHING
+  RETURNING *;
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.assign_contact_tags(UUID, UUID, UUID[], UUID) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.assign_contact_tags(UUID, UUID, UUID[], UUID) TO service_role;
@@ -0,0 +1,67 @@
+-- Single-row inserts with typed scalar arguments for contacts, contact tags and invites.
+-- Run after 025_assign_contact_tags.sql. Each returns the inserted row; unique violations
+-- (duplicate email / tag name / invite) surface as SQLSTATE 23505, mapped to 400 by the API.
+
+CREATE OR REPLACE FUNCTION public.insert_contact(
+  p_organization_id UUID,
+  p_email TEXT,
+  p_first_name TEXT,
+  p_last_name TEXT,
+  p_mobile TEXT,
+  p_country TEXT,
+  p_source TEXT,
+  p_is_active BOOLEAN,
+  p_is_subscribed BOOLEAN,
+  p_created_by UUID
+)
+RETURNS SETOF public.contacts
+LANGUAGE sql
+SET search_path = public
+AS $$
+  INSERT INTO public.contacts (
+    organization_id, email, first_name, last_name, mobile, country,
+    source, is_active, is_subscribed, created_by
+  )
+  VALUES (
+    p_organization_id, p_email, p_first_name, p_last_name, p_mobile, p_country,
+    p_source, p_is_active, p_is_subscribed, p_created_by
+  )
+  RETURNING *;
+$$;
+
+CREATE OR REPLACE FUNCTION public.insert_contact_tag(
+  p_organization_id UUID,
+  p_name TEXT,
+  p_color TEXT,
+  p_created_by UUID
+)
+RETURNS SETOF public.contact_tags
+LANGUAGE sql
+SET search_path = public
+AS $$
+  INSERT INTO public.contact_tags (organization_id, name, color, created_by)
+  VALUES (p_organization_id, p_name, p_color, p_created_by)
+  RETURNING *;
+$$;
+
+CREATE OR REPLACE FUNCTION public.insert_organization_invite(
+  p_organization_id UUID,
+  p_email TEXT,
+  p_role TEXT,
+  p_invited_by_user_id UUID
+)
+RETURNS SETOF public.organization_invites
+LANGUAGE sql
+SET search_path = public
+AS $$
+  INSERT INTO public.organization_invites (organization_id, email, role, invited_by_user_id)
+  VALUES (p_organization_id, p_email, p_role, p_invited_by_user_id)
+  RETURNING *;
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.insert_contact(UUID, TEXT, TEXT, TEXT, TEXT, TEXT, TEXT, BOOLEAN, BOOLEAN, UUID) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.insert_contact_tag(UUID, TEXT, TEXT, UUID) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.insert_organization_invite(UUID, TEXT, TEXT, UUID) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.insert_contact(UUID, TEXT, TEXT, TEXT, TEXT, TEXT, TEXT, BOOLEAN, BOOLEAN, UUID) TO service_role;
+GRANT EXECUTE ON FUNCTION public.insert_contact_tag(UUID, TEXT, TEXT, UUID) TO service_role;
+GRANT EXECUTE ON FUNCTION public.insert_organization_invite(UUID, TEXT, TEXT, UUID) TO service_role;
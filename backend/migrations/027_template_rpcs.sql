@@ -0,0 +1,72 @@
+-- Org-scoped template reads: membership check + query in one round trip (same pattern as 011).
+-- Run after 026_scalar_insert_rpcs.sql. Non-members get SQLSTATE 42501, mapped to 403 by the API.
+
+CREATE OR REPLACE FUNCTION public.org_list_templates(
+  p_organization_id UUID,
+  p_user_id UUID,
+  p_limit INT,
+  p_offset INT,
+  p_include_admin BOOLEAN
+)
+RETURNS jsonb
+LANGUAGE plpgsql
+STABLE
+SET search_path = public
+AS $$
+DECLARE
+  v_total BIGINT;
+  v_rows JSONB;
+  v_admin JSONB := '[]'::jsonb;
+BEGIN
+  PERFORM public.assert_org_member(p_organization_id, p_user_id);
+  SELECT count(*) INTO v_total
+  FROM public.templates t
+  WHERE t.organization_id = p_organization_id;
+  SELECT coalesce(jsonb_agg(to_jsonb(x) ORDER BY x.updated_at DESC), '[]'::jsonb) INTO v_rows
+  FROM (
+    SELECT t.id, t.organization_id, t.name, t.admin_provided, t.subject_line, t.created_at, t.updated_at
+    FROM public.templates t
+    WHERE t.organization_id = p_organization_id
+    ORDER BY t.updated_at DESC
+    LIMIT p_limit OFFSET p_offset
+  ) x;
+  IF p_include_admin THEN
+    SELECT coalesce(jsonb_agg(to_jsonb(x) ORDER BY x.name), '[]'::jsonb) INTO v_admin
+    FROM (
+      SELECT t.id, t.organization_id, t.name, t.admin_provided, t.subject_line, t.created_at, t.updated_at
+      FROM public.templates t
+      WHERE t.organization_id IS NULL AND t.admin_provided
+    ) x;
+  END IF;
+  RETURN jsonb_build_object(
+    'templates', v_rows || v_admin,
+    'total', v_total + jsonb_array_length(v_admin)
+  );
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION public.org_get_template(
+  p_organization_id UUID,
+  p_user_id UUID,
+  p_template_id UUID
+)
+RETURNS SETOF public.templates
+LANGUAGE plpgsql
+STABLE
+SET search_path = public
+AS $$
+BEGIN
+  PERFORM public.assert_org_member(p_organization_id, p_user_id);
+  RETURN QUERY
+    SELECT t.*
+    FROM public.templates t
+    WHERE t.id = p_template_id
+      AND (t.organization_id = p_organization_id OR t.organization_id IS NULL)
+    LIMIT 1;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.org_list_templates(UUID, UUID, INT, INT, BOOLEAN) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.org_get_template(UUID, UUID, UUID) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.org_list_templates(UUID, UUID, INT, INT, BOOLEAN) TO service_role;
+GRANT EXECUTE ON FUNCTION public.org_get_template(UUID, UUID, UUID) TO service_role;
@@ -0,0 +1,56 @@
+-- org_list_templates: make the org count optional so the API can serve a cached total.
+-- Run after 027_template_rpcs.sql. Returns org_total (NULL when p_with_total is false)
+-- instead of a combined total; the API adds the admin-provided rows itself.
+
+DROP FUNCTION IF EXISTS public.org_list_templates(UUID, UUID, INT, INT, BOOLEAN);
+
+CREATE OR REPLACE FUNCTION public.org_list_templates(
+  p_organization_id UUID,
+  p_user_id UUID,
+  p_limit INT,
+  p_offset INT,
+  p_include_admin BOOLEAN,
+  p_with_total BOOLEAN DEFAULT true
+)
+RETURNS jsonb
+LANGUAGE plpgsql
+STABLE
+SET search_path = public
+AS $$
+DECLARE
+  v_total BIGINT;
+  v_rows JSONB;
+  v_admin JSONB := '[]'::jsonb;
+BEGIN
+  PERFORM public.assert_org_member(p_organization_id, p_user_id);
+  IF p_with_total THEN
+    SELECT count(*) INTO v_total
+    FROM public.templates t
+    WHERE t.organization_id = p_organization_id;
+  END IF;
+  SELECT coalesce(jsonb_agg(to_jsonb(x) ORDER BY x.updated_at DESC), '[]'::jsonb) INTO v_rows
+  FROM (
+    SELECT t.id, t.organization_id, t.name, t.admin_provided, t.subject_line, t.created_at, t.updated_at
+    FROM public.templates t
+    WHERE t.organization_id = p_organization_id
+    ORDER BY t.updated_at DESC
+    LIMIT p_limit OFFSET p_offset
+  ) x;
+  IF p_include_admin THEN
+    SELECT coalesce(jsonb_agg(to_jsonb(x) ORDER BY x.name), '[]'::jsonb) INTO v_admin
+    FROM (
+      SELECT t.id, t.organization_id, t.name, t.admin_provided, t.subject_line, t.created_at, t.updated_at
+      FROM public.templates t
+      WHERE t.organization_id IS NULL AND t.admin_provided
+    ) x;
+  END IF;
+  RETURN jsonb_build_object(
+    'templates', v_rows,
+    'admin_templates', v_admin,
+    'org_total', v_total
+  );
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.org_list_templates(UUID, UUID, INT, INT, BOOLEAN, BOOLEAN) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.org_list_templates(UUID, UUID, INT, INT, BOOLEAN, BOOLEAN) TO service_role;
@@ -0,0 +1,58 @@
+-- P2-SES-004: Record a batch of open/click hits in one call.
+-- Run after 028_templates_optional_count.sql. p_events is a JSON array of
+-- {event_type: 'open'|'click', recipient_id, link_url, at}. Only the first open / first click per
+-- recipient stamps opened_at / clicked_at and logs an email_events row; repeats are ignored.
+-- The UPDATE ... IS NULL and the INSERT run in one statement, so concurrent batches cannot
+-- both log the same first event.
+
+CREATE OR REPLACE FUNCTION public.record_tracking_events(p_events JSONB)
+RETURNS INT
+LANGUAGE plpgsql
+SET search_path = public
+AS $$
+DECLARE
+  v_opens INT;
+  v_clicks INT;
+BEGIN
+  WITH ev AS (
+    SELECT DISTINCT ON (e.recipient_id) e.recipient_id, e.at
+    FROM jsonb_to_recordset(p_events) AS e(event_type TEXT, recipient_id UUID, link_url TEXT, at TIMESTAMPTZ)
+    WHERE e.event_type = 'open'
+    ORDER BY e.recipient_id, e.at
+  ),
+  upd AS (
+    UPDATE public.campaign_recipients r
+    SET opened_at = coalesce(ev.at, now())
+    FROM ev
+    WHERE r.id = ev.recipient_id AND r.opened_at IS NULL
+    RETURNING r.id, r.campaign_id, r.organization_id
+  )
+  INSERT INTO public.email_events (campaign_id, campaign_recipient_id, organization_id, event_type, link_url)
+  SELECT upd.campaign_id, upd.id, upd.organization_id, 'open', NULL
+  FROM upd;
+  GET DIAGNOSTICS v_opens = ROW_COUNT;
+
+  WITH ev AS (
+    SELECT DISTINCT ON (e.recipient_id) e.recipient_id, e.link_url, e.at
+    FROM jsonb_to_recordset(p_events) AS e(event_type TEXT, recipient_id UUID, link_url TEXT, at TIMESTAMPTZ)
+    WHERE e.event_type = 'click'
+    ORDER BY e.recipient_id, e.at
+  ),
+  upd AS (
+    UPDATE public.campaign_recipients r
+    SET clicked_at = coalesce(ev.at, now())
+    FROM ev
+    WHERE r.id = ev.recipient_id AND r.clicked_at IS NULL
+    RETURNING r.id, r.campaign_id, r.organization_id, ev.link_url
+  )
+  INSERT INTO public.email_events (campaign_id, campaign_recipient_id, organization_id, event_type, link_url)
+  SELECT upd.campaign_id, upd.id, upd.organization_id, 'click', upd.link_url
+  FROM upd;
+  GET DIAGNOSTICS v_clicks = ROW_COUNT;
+
+  RETURN v_opens + v_clicks;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.record_tracking_events(JSONB) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.record_tracking_events(JSONB) TO service_role;
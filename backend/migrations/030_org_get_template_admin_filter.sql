@@ -0,0 +1,24 @@
+-- org_get_template: global rows must also be admin_provided, matching org_list_templates.
+-- Run after 029_record_tracking_events.sql.
+
+CREATE OR REPLACE FUNCTION public.org_get_template(
+  p_organization_id UUID,
+  p_user_id UUID,
+  p_template_id UUID
+)
+RETURNS SETOF public.templates
+LANGUAGE plpgsql
+STABLE
+SET search_path = public
+AS $$
+BEGIN
+  PERFORM public.assert_org_member(p_organization_id, p_user_id);
+  RETURN QUERY
+    SELECT t.*
+    FROM public.templates t
+    WHERE t.id = p_template_id
+      AND (t.organization_id = p_organization_id
+           OR (t.organization_id IS NULL AND t.admin_provided))
+    LIMIT 1;
+END;
+$$;
@@ -0,0 +1,6 @@
+-- Covering index for membership checks: (organization_id, user_id) -> role as an index-only scan.
+-- Run after 030_org_get_template_admin_filter.sql. UNIQUE(organization_id, user_id) from 001 already
+-- makes the lookup an index scan; INCLUDE (role) saves the heap fetch for the role.
+
+CREATE INDEX IF NOT EXISTS idx_organization_members_org_user_role
+  ON public.organization_members(organization_id, user_id) INCLUDE (role);
@@ -0,0 +1,91 @@
+-- P2-SES-002: Resolve a campaign's audience (target rules) in one query.
+-- Run after 031_org_members_role_covering_index.sql. Replaces the backend's contacts fetch plus
+-- separate tag / assignment / bounced lookups and Python-side filtering. Rules default to
+-- exclude_unsubscribed, exclude_inactive when the campaign has no campaign_target_rules row.
+
+CREATE OR REPLACE FUNCTION public.resolve_campaign_recipients(
+  p_organization_id UUID,
+  p_campaign_id UUID
+)
+RETURNS TABLE (id UUID, email TEXT, first_name TEXT, last_name TEXT, country TEXT)
+LANGUAGE plpgsql
+STABLE
+SET search_path = public
+AS $$
+DECLARE
+  v_include TEXT[];
+  v_exclude TEXT[];
+  v_countries TEXT[];
+  v_unsubscribed BOOLEAN;
+  v_inactive BOOLEAN;
+  v_bounced BOOLEAN;
+  v_include_ids UUID[];
+BEGIN
+  IF NOT EXISTS (
+    SELECT 1 FROM public.campaigns c
+    WHERE c.id = p_campaign_id AND c.organization_id = p_organization_id
+  ) THEN
+    RETURN;
+  END IF;
+
+  SELECT
+    (SELECT array_agg(btrim(t)) FROM unnest(r.include_tags) t WHERE btrim(t) <> ''),
+    (SELECT array_agg(btrim(t)) FROM unnest(r.exclude_tags) t WHERE btrim(t) <> ''),
+    (SELECT array_agg(lower(btrim(t))) FROM unnest(r.exclude_countries) t WHERE t <> ''),
+    r.exclude_unsubscribed,
+    r.exclude_inactive,
+    r.exclude_bounced
+  INTO v_include, v_exclude, v_countries, v_unsubscribed, v_inactive, v_bounced
+  FROM public.campaign_target_rules r
+  WHERE r.campaign_id = p_campaign_id;
+  v_unsubscribed := coalesce(v_unsubscribed, true);
+  v_inactive := coalesce(v_inactive, true);
+  v_bounced := coalesce(v_bounced, false);
+
+  -- include_tags names that match no tag in the org select nobody.
+  IF v_include IS NOT NULL THEN
+    v_include_ids := ARRAY(
+      SELECT ct.id FROM public.contact_tags ct
+      WHERE ct.organization_id = p_organization_id AND ct.name = ANY (v_include)
+    );
+    IF cardinality(v_include_ids) = 0 THEN
+      RETURN;
+    END IF;
+  END IF;
+
+  RETURN QUERY
+    SELECT c.id,
+           btrim(c.email),
+           coalesce(btrim(c.first_name), ''),
+           coalesce(btrim(c.last_name), ''),
+           coalesce(btrim(c.country), '')
+    FROM public.contacts c
+    WHERE c.organization_id = p_organization_id
+      AND c.deleted_at IS NULL
+      AND btrim(coalesce(c.email, '')) <> ''
+      AND (NOT v_inactive OR c.is_active)
+      AND (NOT v_unsubscribed OR c.is_subscribed)
+      AND (v_countries IS NULL OR lower(btrim(coalesce(c.country, ''))) <> ALL (v_countries))
+      AND (v_include_ids IS NULL OR EXISTS (
+        SELECT 1 FROM public.contact_tag_assignments a
+        WHERE a.contact_id = c.id AND a.tag_id = ANY (v_include_ids)
+      ))
+      AND (v_exclude IS NULL OR NOT EXISTS (
+        SELECT 1
+        FROM public.contact_tag_assignments a
+        JOIN public.contact_tags ct ON ct.id = a.tag_id
+        WHERE a.contact_id = c.id
+          AND ct.organization_id = p_organization_id
+          AND ct.name = ANY (v_exclude)
+      ))
+      AND (NOT v_bounced OR NOT EXISTS (
+        SELECT 1 FROM public.campaign_recipients cr
+        WHERE cr.contact_id = c.id
+          AND cr.organization_id = p_organization_id
+          AND cr.status = 'bounced'
+      ));
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.resolve_campaign_recipients(UUID, UUID) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.resolve_campaign_recipients(UUID, UUID) TO service_role;
@@ -0,0 +1,32 @@
+-- P2-SES-002: Prepare a campaign's recipients in the database.
+-- Run after 032_resolve_campaign_recipients.sql. Inserts the resolved audience as pending
+-- campaign_recipients (existing (campaign_id, contact_id) rows are kept) and returns the audience
+-- size, so contact lists never travel to the API and back.
+
+CREATE OR REPLACE FUNCTION public.prepare_campaign_recipients(
+  p_organization_id UUID,
+  p_campaign_id UUID
+)
+RETURNS INT
+LANGUAGE plpgsql
+SET search_path = public
+AS $$
+DECLARE
+  v_count INT;
+BEGIN
+  WITH audience AS (
+    SELECT r.id FROM public.resolve_campaign_recipients(p_organization_id, p_campaign_id) r
+  ),
+  ins AS (
+    INSERT INTO public.campaign_recipients (campaign_id, contact_id, organization_id, status)
+    SELECT p_campaign_id, a.id, p_organization_id, 'pending'
+    FROM audience a
+    ON CONFLICT (campaign_id, contact_id) DO NOTHING
+  )
+  SELECT count(*) INTO v_count FROM audience;
+  RETURN v_count;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.prepare_campaign_recipients(UUID, UUID) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.prepare_campaign_recipients(UUID, UUID) TO service_role;
@@ -0,0 +1,7 @@
+-- Partial index for the exclude_bounced probe in resolve_campaign_recipients.
+-- Run after 033_prepare_campaign_recipients.sql. The NOT EXISTS anti-join looks up one contact at a
+-- time; idx_campaign_recipients_contact would visit every campaign that contact was ever in, while
+-- this index only holds bounced rows, so the common "never bounced" case is a single empty probe.
+
+CREATE INDEX IF NOT EXISTS idx_campaign_recipients_bounced_contact
+  ON public.campaign_recipients(contact_id, organization_id) WHERE status = 'bounced';
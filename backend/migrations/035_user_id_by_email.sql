@@ -0,0 +1,17 @@
+-- Look up an auth user's id by email (used by scripts/seed_dev_org.py).
+-- Run after 034_bounced_contacts_index.sql. auth.users is not exposed through PostgREST, so this
+-- SECURITY DEFINER function gives the service role an indexed single-row lookup instead of paging
+-- through auth.admin.list_users().
+
+CREATE OR REPLACE FUNCTION public.user_id_by_email(p_email TEXT)
+RETURNS UUID
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+SET search_path = public
+AS $$
+  SELECT u.id FROM auth.users u WHERE u.email = lower(btrim(p_email)) LIMIT 1;
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.user_id_by_email(TEXT) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.user_id_by_email(TEXT) TO service_role;
@@ -0,0 +1,104 @@
+-- Campaign counters: one trigger run per statement instead of per recipient row.
+-- Run after 035_user_id_by_email.sql. The FOR EACH ROW trigger from 013 updated the parent
+-- campaign once per recipient, making that row a hot lock during a send; batched statements
+-- (record_tracking_events, chunked sent_at updates) that touch several campaigns locked them
+-- in arbitrary order and could deadlock. Now the deltas are summed per campaign from the
+-- transition tables, the campaigns are locked in id order, and each gets a single UPDATE.
+-- Transition tables cannot be combined with several events or a column list, hence three
+-- triggers sharing one function.
+
+CREATE OR REPLACE FUNCTION public.campaign_recipients_update_counters()
+RETURNS trigger
+LANGUAGE plpgsql
+SET search_path = public
+AS $$
+DECLARE
+  v_ids UUID[];
+  v_sent INT[];
+  v_open INT[];
+  v_click INT[];
+BEGIN
+  -- Per-campaign deltas; all four arrays come from one aggregate pass, so positions line up.
+  IF TG_OP = 'INSERT' THEN
+    SELECT array_agg(d.campaign_id), array_agg(d.sent), array_agg(d.opened), array_agg(d.clicked)
+    INTO v_ids, v_sent, v_open, v_click
+    FROM (
+      SELECT n.campaign_id,
+             count(n.sent_at)::int AS sent,
+             count(n.opened_at)::int AS opened,
+             count(n.clicked_at)::int AS clicked
+      FROM new_rows n
+      GROUP BY n.campaign_id
+      HAVING count(n.sent_at) + count(n.opened_at) + count(n.clicked_at) > 0
+    ) d;
+  ELSIF TG_OP = 'DELETE' THEN
+    SELECT array_agg(d.campaign_id), array_agg(d.sent), array_agg(d.opened), array_agg(d.clicked)
+    INTO v_ids, v_sent, v_open, v_click
+    FROM (
+      SELECT o.campaign_id,
+             -count(o.sent_at)::int AS sent,
+             -count(o.opened_at)::int AS opened,
+             -count(o.clicked_at)::int AS clicked
+      FROM old_rows o
+      GROUP BY o.campaign_id
+      HAVING count(o.sent_at) + count(o.opened_at) + count(o.clicked_at) > 0
+    ) d;
+  ELSE
+    SELECT array_agg(d.campaign_id), array_agg(d.sent), array_agg(d.opened), array_agg(d.clicked)
+    INTO v_ids, v_sent, v_open, v_click
+    FROM (
+      SELECT x.campaign_id,
+             sum(x.sent)::int AS sent,
+             sum(x.opened)::int AS opened,
+             sum(x.clicked)::int AS clicked
+      FROM (
+        SELECT n.campaign_id,
+               (n.sent_at IS NOT NULL)::int AS sent,
+               (n.opened_at IS NOT NULL)::int AS opened,
+               (n.clicked_at IS NOT NULL)::int AS clicked
+        FROM new_rows n
+        UNION ALL
+        SELECT o.campaign_id,
+               -(o.sent_at IS NOT NULL)::int,
+               -(o.opened_at IS NOT NULL)::int,
+               -(o.clicked_at IS NOT NULL)::int
+        FROM old_rows o
+      ) x
+      GROUP BY x.campaign_id
+      HAVING sum(x.sent) <> 0 OR sum(x.opened) <> 0 OR sum(x.clicked) <> 0
+    ) d;
+  END IF;
+
+  IF v_ids IS NULL THEN
+    RETURN NULL;
+  END IF;
+
+  -- Lock in id order so concurrent statements queue behind each other instead of deadlocking.
+  PERFORM 1 FROM public.campaigns c WHERE c.id = ANY (v_ids) ORDER BY c.id FOR UPDATE;
+  UPDATE public.campaigns c
+  SET sent_count = c.sent_count + d.sent,
+      open_count = c.open_count + d.opened,
+      click_count = c.click_count + d.clicked
+  FROM unnest(v_ids, v_sent, v_open, v_click) AS d(campaign_id, sent, opened, clicked)
+  WHERE c.id = d.campaign_id;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS campaign_recipients_counters ON public.campaign_recipients;
+DROP TRIGGER IF EXISTS campaign_recipients_counters_insert ON public.campaign_recipients;
+DROP TRIGGER IF EXISTS campaign_recipients_counters_update ON public.campaign_recipients;
+DROP TRIGGER IF EXISTS campaign_recipients_counters_delete ON public.campaign_recipients;
+
+CREATE TRIGGER campaign_recipients_counters_insert
+  AFTER INSERT ON public.campaign_recipients
+  REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION public.campaign_recipients_update_counters();
+CREATE TRIGGER campaign_recipients_counters_update
+  AFTER UPDATE ON public.campaign_recipients
+  REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION public.campaign_recipients_update_counters();
+CREATE TRIGGER campaign_recipients_counters_delete
+  AFTER DELETE ON public.campaign_recipients
+  REFERENCING OLD TABLE AS old_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION public.campaign_recipients_update_counters();
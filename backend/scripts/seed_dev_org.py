@@ -31,6 +31,20 @@ def slugify(name: str) -> str:
     return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-") or "org"
 
 
+def user_id_from_list(client, email: str) -> str | None:
+    """Fallback: scan auth.admin.list_users() (before migration 035 is applied)."""
+    resp = client.auth.admin.list_users()
+    users = getattr(resp, "users", None) or getattr(
+        resp, "data", None) or (resp if isinstance(resp, list) else [])
+    for u in users:
+        u_email = getattr(u, "email", None) or (
+            u.get("email") if isinstance(u, dict) else None)
+        if u_email == email:
+            return getattr(u, "id", None) or (
+                u.get("id") if isinstance(u, dict) else None)
+    return None
+
+
 def main() -> int:
     parser = argparse.ArgumentParser(
         description="Create dev org + add user as owner")
@@ -71,18 +85,13 @@ def main() -> int:
 
     if args.email:
         try:
-            resp = client.auth.admin.list_users()
-            users = getattr(resp, "users", None) or getattr(
-                resp, "data", None) or (resp if isinstance(resp, list) else [])
-            for u in users:
-                email = getattr(u, "email", None) or (
-                    u.get("email") if isinstance(u, dict) else None)
-                if email == args.email:
-                    user_id = getattr(u, "id", None) or (
-                        u.get("id") if isinstance(u, dict) else None)
-                    break
-            else:
+            # Indexed lookup in auth.users (migration 035); scan the user list only if that misses.
+            try:
+                user_id = client.rpc("user_id_by_email", {"p_email": args.email}).execute().data
+            except Exception:
                 user_id = None
+            if not user_id:
+                user_id = user_id_from_list(client, args.email)
             if not user_id:
                 print(
                     f"No user found with email {args.email}. Create the user in Supabase Auth first, or use --user-id <uuid>.", file=sys.stderr)
@@ -106,7 +115,7 @@ def main() -> int:
         "slug": org_slug,
     }).execute()
 
-    if not org_res.data or len(org_res.data) == 0:
+    if not org_res.data:
         print("Failed to create organization", file=sys.stderr)
         if hasattr(org_res, "errors") and org_res.errors:
             print(org_res.errors, file=sys.stderr)
@@ -121,7 +130,7 @@ def main() -> int:
         "role": "owner",
     }).execute()
 
-    if not mem_res.data or len(mem_res.data) == 0:
+    if not mem_res.data:
         print("Failed to add membership", file=sys.stderr)
         if hasattr(mem_res, "errors") and mem_res.errors:
             print(mem_res.errors, file=sys.stderr)
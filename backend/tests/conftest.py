@@ -0,0 +1,19 @@
+"""Shared fixtures. Settings are cached process-wide, so tests that change the environment
+clear the cache before and after."""
+
+import pytest
+
+from app.config import get_settings
+
+
+@pytest.fixture
+def settings_env(monkeypatch):
+    """Set environment variables for Settings: settings_env(TRACKING_SECRET="...")."""
+
+    def _set(**values: str) -> None:
+        for key, value in values.items():
+            monkeypatch.setenv(key, value)
+        get_settings.cache_clear()
+
+    yield _set
+    get_settings.cache_clear()
@@ -0,0 +1,98 @@
+"""MicroBatcher: results and failures reach the callers whose items were in the batch."""
+
+import threading
+
+import pytest
+
+from app.services.batcher import MicroBatcher
+
+
+class BadItemError(Exception):
+    pass
+
+
+def _submit_together(batcher: MicroBatcher, items: list) -> list:
+    """Submit items from separate threads so they land in one batch; return their futures."""
+    futures: list = [None] * len(items)
+    barrier = threading.Barrier(len(items))
+
+    def submit(i: int) -> None:
+        barrier.wait()
+        futures[i] = batcher.submit(items[i])
+
+    threads = [threading.Thread(target=submit, args=(i,)) for i in range(len(items))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return futures
+
+
+def _flush_rejecting_bad(batches: list):
+    def flush(items: list) -> list:
+        batches.append(list(items))
+        if any(item < 0 for item in items):
+            raise BadItemError("negative")
+        return [item * 10 for item in items]
+
+    return flush
+
+
+def test_each_caller_gets_its_own_result():
+    batches: list = []
+    batcher = MicroBatcher(_flush_rejecting_bad(batches), max_batch=10, max_wait=0.2)
+    try:
+        futures = _submit_together(batcher, [1, 2, 3])
+        assert sorted(f.result(timeout=5) for f in futures) == [10, 20, 30]
+        assert len(batches) == 1
+    finally:
+        batcher.close()
+
+
+def test_failed_batch_fails_every_caller_in_it():
+    batches: list = []
+    batcher = MicroBatcher(_flush_rejecting_bad(batches), max_batch=10, max_wait=0.2)
+    try:
+        futures = _submit_together(batcher, [1, -1, 3])
+        for f in futures:
+            with pytest.raises(BadItemError):
+                f.result(timeout=5)
+    finally:
+        batcher.close()
+
+
+def test_retry_singly_fails_only_the_bad_item():
+    batches: list = []
+    batcher = MicroBatcher(
+        _flush_rejecting_bad(batches), max_batch=10, max_wait=0.2, retry_singly=True)
+    try:
+        items = [1, -1, 3]
+        futures = _submit_together(batcher, items)
+        for item, f in zip(items, futures):
+            if item < 0:
+                with pytest.raises(BadItemError):
+                    f.result(timeout=5)
+            else:
+                assert f.result(timeout=5) == item * 10
+        assert len(batches) == 4  # the failed batch, then one flush per item
+    finally:
+        batcher.close()
+
+
+def test_batches_are_capped_at_max_batch():
+    batches: list = []
+    batcher = MicroBatcher(_flush_rejecting_bad(batches), max_batch=2, max_wait=0.2)
+    try:
+        futures = _submit_together(batcher, [1, 2, 3, 4, 5])
+        assert sorted(f.result(timeout=5) for f in futures) == [10, 20, 30, 40, 50]
+        assert all(len(b) <= 2 for b in batches)
+    finally:
+        batcher.close()
+
+
+def test_close_flushes_queued_items():
+    batches: list = []
+    batcher = MicroBatcher(_flush_rejecting_bad(batches), max_batch=10, max_wait=5)
+    future = batcher.submit(7)
+    batcher.close()
+    assert future.result(timeout=1) == 70
@@ -0,0 +1,140 @@
+"""Bulk CSV import: parsing/validation and the chunked insert."""
+
+from uuid import UUID
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.v1.contacts import _insert_import_chunk, _parse_import_csv
+
+ORG_ID = UUID("4f1c2b8e-9a3d-4e5f-8a7b-1c2d3e4f5a6b")
+
+
+def _parse(text: str, column_mapping: str | None = None):
+    return _parse_import_csv(text.encode(), column_mapping, "csv_import", ORG_ID, "user-1")
+
+
+def test_headers_are_inferred_from_aliases_and_bom_is_stripped():
+    pending, errors, total = _parse(
+        "\ufeffE-mail,First Name,Surname,Phone\n"
+        "  a@example.com ,Ann, Lee ,\n"
+        ",,,+15550100\n"
+    )
+    assert errors == []
+    assert total == 2
+    assert pending == [
+        (2, {
+            "organization_id": str(ORG_ID), "source": "csv_import", "is_active": True,
+            "is_subscribed": True, "created_by": "user-1",
+            "email": "a@example.com", "first_name": "Ann", "last_name": "Lee",
+        }),
+        (3, {
+            "organization_id": str(ORG_ID), "source": "csv_import", "is_active": True,
+            "is_subscribed": True, "created_by": "user-1", "mobile": "+15550100",
+        }),
+    ]
+
+
+def test_row_errors_are_reported_by_csv_row_and_blank_rows_skipped():
+    pending, errors, total = _parse(
+        "email,first_name\n"
+        "not-an-email,Bob\n"
+        ",Carol\n"
+        " , \n"
+        "d@example.com\n"
+    )
+    assert errors == [
+        {"row": 2, "reason": "Invalid email format"},
+        {"row": 3, "reason": "Missing email and mobile"},
+    ]
+    assert total == 4
+    assert [(row, payload["email"]) for row, payload in pending] == [(5, "d@example.com")]
+
+
+def test_explicit_column_mapping_wins_over_inference():
+    pending, errors, _ = _parse(
+        "Work,Email\nw@example.com,home@example.com\n", '{"email": "Work"}')
+    assert errors == []
+    assert pending[0][1]["email"] == "w@example.com"
+
+
+@pytest.mark.parametrize(("content", "detail"), [
+    (b"", "CSV is empty"),
+    (b"\xff\xfe\x00", "CSV must be UTF-8 encoded"),
+    (b"foo,bar\n1,2\n", None),
+])
+def test_unusable_files_are_400(content, detail):
+    with pytest.raises(HTTPException) as exc:
+        _parse_import_csv(content, None, "csv_import", ORG_ID, "user-1")
+    assert exc.value.status_code == 400
+    if detail:
+        assert exc.value.detail == detail
+
+
+class _Result:
+    def __init__(self, data):
+        self.data = data
+
+
+class _FakeClient:
+    """Records import_contacts calls; inserted_emails decides what the RPC returns."""
+
+    def __init__(self, inserted_emails=None, rpc_error: Exception | None = None):
+        self.inserted_emails = inserted_emails or []
+        self.rpc_error = rpc_error
+        self.rpc_calls: list = []
+        self.row_inserts: list = []
+
+    def rpc(self, fn, params):
+        self.rpc_calls.append((fn, params))
+        client = self
+
+        class _Call:
+            def execute(self):
+                if client.rpc_error:
+                    raise client.rpc_error
+                return _Result([{"email": e} for e in client.inserted_emails])
+
+        return _Call()
+
+    def table(self, name):
+        client = self
+
+        class _Insert:
+            def insert(self, payload):
+                self.payload = payload
+                return self
+
+            def execute(self):
+                client.row_inserts.append(self.payload)
+                if self.payload.get("email") == "bad@example.com":
+                    raise ValueError("violates check constraint")
+                return _Result([self.payload])
+
+        return _Insert()
+
+
+def test_chunk_is_one_rpc_and_duplicates_are_reported():
+    chunk = [
+        (2, {"email": "a@example.com"}),
+        (3, {"email": "A@example.com"}),
+        (4, {"email": "b@example.com"}),
+        (5, {"mobile": "+15550100"}),
+    ]
+    client = _FakeClient(inserted_emails=["a@example.com"])
+    errors: list = []
+    assert _insert_import_chunk(client, chunk, errors) == 2
+    assert client.rpc_calls == [("import_contacts", {"p_rows": [p for _, p in chunk]})]
+    assert errors == [
+        {"row": 3, "reason": "Duplicate email"},
+        {"row": 4, "reason": "Duplicate email"},
+    ]
+
+
+def test_failed_chunk_is_retried_row_by_row():
+    chunk = [(2, {"email": "ok@example.com"}), (3, {"email": "bad@example.com"})]
+    client = _FakeClient(rpc_error=RuntimeError("batch rejected"))
+    errors: list = []
+    assert _insert_import_chunk(client, chunk, errors) == 1
+    assert [p["email"] for p in client.row_inserts] == ["ok@example.com", "bad@example.com"]
+    assert errors == [{"row": 3, "reason": "violates check constraint"}]
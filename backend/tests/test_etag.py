@@ -0,0 +1,51 @@
+"""Conditional GET via json_with_etag."""
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.etag import json_with_etag
+
+app = FastAPI()
+state = {"items": [1, 2, 3]}
+
+
+@app.get("/items")
+def items(request: Request):
+    return json_with_etag(request, {"items": state["items"]})
+
+
+@pytest.fixture
+def client():
+    state["items"] = [1, 2, 3]
+    return TestClient(app)
+
+
+def test_response_carries_etag_and_revalidation_header(client):
+    r = client.get("/items")
+    assert r.status_code == 200
+    assert r.json() == {"items": [1, 2, 3]}
+    assert r.headers["etag"].startswith('W/"')
+    assert r.headers["cache-control"] == "private, no-cache"
+
+
+def test_matching_if_none_match_returns_304_without_body(client):
+    etag = client.get("/items").headers["etag"]
+    r = client.get("/items", headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    assert r.content == b""
+    assert r.headers["etag"] == etag
+
+
+def test_etag_in_list_and_wildcard_match(client):
+    etag = client.get("/items").headers["etag"]
+    assert client.get("/items", headers={"If-None-Match": f'W/"other", {etag}'}).status_code == 304
+    assert client.get("/items", headers={"If-None-Match": "*"}).status_code == 304
+
+
+def test_changed_body_gets_new_etag(client):
+    etag = client.get("/items").headers["etag"]
+    state["items"] = [1, 2]
+    r = client.get("/items", headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["etag"] != etag
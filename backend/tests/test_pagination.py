@@ -0,0 +1,45 @@
+"""Keyset pagination cursors."""
+
+import pytest
+from fastapi import HTTPException
+
+from app.pagination import decode_cursor, encode_cursor, paginate
+
+ROW = {
+    "id": "4f1c2b8e-9a3d-4e5f-8a7b-1c2d3e4f5a6b",
+    "created_at": "2026-10-15T12:30:45.123456+00:00",
+}
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(ROW)) == (ROW["created_at"], ROW["id"])
+
+
+def test_cursor_is_url_safe_without_padding():
+    cursor = encode_cursor(ROW)
+    assert "=" not in cursor
+    assert all(c.isalnum() or c in "-_" for c in cursor)
+
+
+def test_no_cursor_means_first_page():
+    assert decode_cursor(None) == (None, None)
+    assert decode_cursor("") == (None, None)
+
+
+@pytest.mark.parametrize("cursor", ["not base64!", "bm8tcGlwZQ", "MjAyNi0xMC0xNXxub3QtYS11dWlk"])
+def test_malformed_cursor_is_400(cursor):
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(cursor)
+    assert exc.value.status_code == 400
+
+
+def test_paginate_trims_extra_row_and_points_after_last_kept_row():
+    rows = [{"id": f"00000000-0000-0000-0000-00000000000{i}", "created_at": ROW["created_at"]}
+            for i in range(3)]
+    page, next_cursor = paginate(rows, 2)
+    assert page == rows[:2]
+    assert decode_cursor(next_cursor) == (rows[1]["created_at"], rows[1]["id"])
+
+
+def test_paginate_last_page_has_no_cursor():
+    assert paginate([ROW], 2) == ([ROW], None)
@@ -0,0 +1,110 @@
+"""Tracking tokens and tracked links in the SES campaign template."""
+
+import base64
+import hashlib
+import hmac
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import pytest
+
+from app.services.campaign_send import _build_ses_template
+from app.tracking import create_tracking_token, verify_tracking_token, wrap_links_for_tracking
+
+CLICK_BASE = "https://api.example.com/api/v1/track/click?r={{track_token}}&url="
+
+
+def _render(template: str, data: dict[str, str]) -> str:
+    """Fill {{{var}}} / {{var}} the way SES does for these simple templates."""
+    for key, value in data.items():
+        template = template.replace("{{{" + key + "}}}", value)
+        template = template.replace("{{" + key + "}}", value)
+    return template
+
+
+def test_static_link_is_wrapped():
+    html = wrap_links_for_tracking('<a href="https://example.com/a?b=1">x</a>', CLICK_BASE)
+    assert html == f'<a href="{CLICK_BASE}https%3A%2F%2Fexample.com%2Fa%3Fb%3D1">x</a>'
+
+
+def test_mailto_and_anchor_links_are_left_alone():
+    html = '<a href="mailto:{{email}}">m</a><a href="#top">t</a>'
+    assert wrap_links_for_tracking(html, CLICK_BASE) == html
+
+
+def test_personalised_link_is_wrapped_with_encoded_variables():
+    html = wrap_links_for_tracking(
+        '<a href="https://example.com/u?e={{email}}&n={{{first_name}}}">x</a>', CLICK_BASE)
+    assert html == (
+        '<a href="' + CLICK_BASE
+        + 'https%3A%2F%2Fexample.com%2Fu%3Fe%3D{{{email_url}}}%26n%3D{{{first_name_url}}}">x</a>'
+    )
+
+
+def test_personalised_link_round_trips_through_click_redirect():
+    _, html, _ = _build_ses_template(
+        "Hi", '<a href="https://example.com/p?who={{first_name}}&e={{email}}">go</a>',
+        "https://api.example.com")
+    data = {
+        "track_token": "tok",
+        "first_name": "Zoë & Co",
+        "email": "a+b@example.com",
+        "first_name_url": "Zo%C3%AB%20%26%20Co",
+        "email_url": "a%2Bb%40example.com",
+    }
+    href = _render(html, data).split('href="', 1)[1].split('"', 1)[0]
+    query = parse_qs(urlsplit(href).query)
+    assert query["r"] == ["tok"]
+    assert unquote(query["url"][0]) == "https://example.com/p?who=Zoë & Co&e=a+b@example.com"
+
+
+RECIPIENT_ID = "4f1c2b8e-9a3d-4e5f-8a7b-1c2d3e4f5a6b"
+
+
+def _legacy_token(recipient_id: str, secret: bytes) -> str:
+    """payload.signature format used before compact tokens."""
+    payload = recipient_id.encode()
+    sig = hmac.new(secret, payload, hashlib.sha256).digest()
+    return (base64.urlsafe_b64encode(payload).decode().rstrip("=") + "."
+            + base64.urlsafe_b64encode(sig).decode().rstrip("="))
+
+
+@pytest.fixture
+def tracking_secret(settings_env):
+    settings_env(TRACKING_SECRET="test-secret")
+    return b"test-secret"
+
+
+def test_compact_token_round_trip(tracking_secret):
+    token = create_tracking_token(RECIPIENT_ID)
+    assert len(token) == 43
+    assert "." not in token
+    assert verify_tracking_token(token) == RECIPIENT_ID
+
+
+def test_compact_token_rejects_tampering(tracking_secret):
+    token = create_tracking_token(RECIPIENT_ID)
+    # Change the recipient id bytes (the last character also carries padding bits).
+    flipped = ("A" if token[0] != "A" else "B") + token[1:]
+    assert verify_tracking_token(flipped) is None
+    assert verify_tracking_token(token[:-1]) is None
+
+
+def test_compact_token_rejects_other_secret(tracking_secret, settings_env):
+    token = create_tracking_token(RECIPIENT_ID)
+    settings_env(TRACKING_SECRET="rotated")
+    assert verify_tracking_token(token) is None
+
+
+def test_legacy_token_is_still_accepted(tracking_secret):
+    assert verify_tracking_token(_legacy_token(RECIPIENT_ID, tracking_secret)) == RECIPIENT_ID
+
+
+def test_legacy_token_with_bad_signature_is_rejected(tracking_secret):
+    assert verify_tracking_token(_legacy_token(RECIPIENT_ID, b"wrong")) is None
+
+
+def test_no_secret_means_no_tokens(settings_env):
+    settings_env(TRACKING_SECRET="")
+    with pytest.raises(RuntimeError):
+        create_tracking_token(RECIPIENT_ID)
+    assert verify_tracking_token("x" * 43) is None
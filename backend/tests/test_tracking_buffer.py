@@ -0,0 +1,71 @@
+"""Buffered open/click recording: repeat hits are dropped only after a successful write."""
+
+import pytest
+
+from app.services import tracking_buffer
+from app.services.batcher import MicroBatcher
+
+RECIPIENT_ID = "4f1c2b8e-9a3d-4e5f-8a7b-1c2d3e4f5a6b"
+
+
+class _FakeClient:
+    """rpc(...).execute() fails while fail is set; successful calls are recorded."""
+
+    def __init__(self) -> None:
+        self.fail = False
+        self.calls: list = []
+
+    def rpc(self, fn, params):
+        client = self
+
+        class _Call:
+            def execute(self):
+                if client.fail:
+                    raise RuntimeError("rpc failed")
+                client.calls.append((fn, params))
+
+        return _Call()
+
+
+@pytest.fixture
+def client(monkeypatch):
+    fake = _FakeClient()
+    monkeypatch.setattr(tracking_buffer, "get_supabase_client", lambda: fake)
+    monkeypatch.setattr(tracking_buffer, "tracking_batcher", MicroBatcher(
+        tracking_buffer._record_events, max_batch=200, max_wait=0.01, name="test-tracking"))
+    tracking_buffer._seen.clear()
+    yield fake
+    tracking_buffer.tracking_batcher.close()
+    tracking_buffer._seen.clear()
+
+
+def _hit(event_type: str = "open") -> None:
+    """Record one hit and wait for its batch to be flushed."""
+    tracking_buffer.record_tracking_event(event_type, RECIPIENT_ID)
+    tracking_buffer.tracking_batcher.close()
+
+
+def _recorded(client: _FakeClient) -> list[tuple[str, str]]:
+    return [(e["event_type"], e["recipient_id"])
+            for _, params in client.calls for e in params["p_events"]]
+
+
+def test_repeat_hit_after_successful_write_is_dropped(client):
+    _hit()
+    _hit()
+    assert _recorded(client) == [("open", RECIPIENT_ID)]
+
+
+def test_open_and_click_are_tracked_separately(client):
+    _hit("open")
+    _hit("click")
+    assert _recorded(client) == [("open", RECIPIENT_ID), ("click", RECIPIENT_ID)]
+
+
+def test_hit_after_failed_write_is_recorded(client):
+    client.fail = True
+    _hit()
+    assert _recorded(client) == []
+    client.fail = False
+    _hit()
+    assert _recorded(client) == [("open", RECIPIENT_ID)]